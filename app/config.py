@@ -21,11 +21,31 @@ class Settings(BaseSettings):
     GUIJI_API_KEY: str = ""
     GUIJI_EMB_URL: str = "https://api.siliconflow.cn/v1/embeddings"
     GUIJI_EMB_MODEL: str = "BAAI/bge-m3"
+    # 查询向量缓存：进程内 LRU 条数与过期时间（秒）
+    EMBEDDING_CACHE_SIZE: int = 2000
+    EMBEDDING_CACHE_TTL: int = 7 * 24 * 3600
+    # 是否启用 PostgreSQL 持久层 (query_cache 表)，重启后仍可命中、多 worker 共享
+    EMBEDDING_CACHE_PERSIST: bool = False
+    # 微批合并：等待窗口（毫秒，0 表示不合并）与单批最大条数
+    EMBEDDING_BATCH_WINDOW_MS: float = 5
+    EMBEDDING_BATCH_MAX: int = 32
+    # 单次上游请求超时（秒）
+    EMBEDDING_TIMEOUT: float = 5.0
 
     # --- LongMao LLM ---
     LONGMAO_API_KEY: str = ""
     LONGMAO_BASE_URL: str = "https://api.longcat.chat/openai"
     LONGMAO_MODEL: str = "LongCat-Flash-Lite"
+    # 单次上游请求超时（秒），不做客户端重试，失败计入熔断器
+    LLM_TIMEOUT: float = 5.0
+    # 意图解析缓存：进程内 LRU 条数；是否启用持久层 (query_cache 表，需先执行 migrations/003) 及其过期时间（秒）
+    INTENT_CACHE_SIZE: int = 5000
+    INTENT_CACHE_PERSIST: bool = False
+    INTENT_CACHE_TTL: int = 30 * 24 * 3600
+    # 本地意图词典（歌手名 + 主标题）刷新间隔（秒）；
+    # 同一歌名对应的不同歌手数超过阈值时视为泛化词，不走本地快速通道
+    INTENT_DICT_REFRESH_SECONDS: int = 3600
+    INTENT_MATCH_MAX_TITLE_ARTISTS: int = 3
 
     # --- App ---
     APP_NAME: str = "VibeCheck"
@@ -38,6 +58,54 @@ class Settings(BaseSettings):
     SEARCH_WEIGHT_VIBE: dict = {"review": 0.7, "lyrics": 0.3, "rational": 0.0}
     SEARCH_WEIGHT_LYRICS: dict = {"review": 0.2, "lyrics": 0.6, "rational": 0.2}
     SEARCH_WEIGHT_EXACT: dict = {"review": 0.1, "lyrics": 0.1, "rational": 0.8}
+    # 两阶段检索：每路（review / lyrics / 关键词）召回的候选数，精排只在候选并集上进行
+    SEARCH_CANDIDATE_POOL: int = 200
+    # fusion=rrf 的平滑常数 k：score = Σ w / (k + rank)
+    SEARCH_RRF_K: int = 60
+    # 歌名/歌手模糊匹配的 pg_trgm 相似度阈值（% 运算符）
+    SEARCH_TRGM_THRESHOLD: float = 0.3
+    # 单次检索产出的完整排序列表长度，分页在此列表上进行
+    SEARCH_RESULT_POOL: int = 100
+    # 翻页游标暂存：条数与过期时间（秒）
+    SEARCH_CURSOR_SIZE: int = 5000
+    SEARCH_CURSOR_TTL: int = 600
+    # 搜索响应缓存：条数与过期时间（秒）；数据版本号变化时整体失效
+    SEARCH_CACHE_SIZE: int = 2000
+    SEARCH_CACHE_TTL: int = 3600
+    # auto 模式投机执行：Embedding 返回即按原句启动 vibe 检索，与 LLM 意图解析并行
+    SEARCH_SPECULATIVE: bool = True
+    # 等待 LLM 意图的预算（毫秒），超时直接采用投机的 vibe 结果；0 表示不限
+    SEARCH_INTENT_BUDGET_MS: int = 1500
+    # 单次搜索的总截止时间（毫秒），传递到 LLM / Embedding 调用；0 表示不限
+    SEARCH_DEADLINE_MS: int = 4000
+    # jieba 分词：短查询分词结果缓存条数（分词在专用的单线程上执行）
+    TOKENIZER_CACHE_SIZE: int = 5000
+    # 数据版本号 (data_generation 表) 轮询间隔（秒）
+    DATA_GENERATION_POLL_SECONDS: int = 30
+
+    # --- Recommend ---
+    # 候选池大小：内存后端按向量融合分取 Top-N 后再用 SQL 补 TF-IDF 分
+    RECOMMEND_CANDIDATE_POOL: int = 200
+    # 默认权重的推荐优先读取离线预计算的 song_neighbors 表 (deploy_crawler/compute_song_neighbors.py)
+    RECOMMEND_USE_NEIGHBORS: bool = True
+
+    # --- Home ---
+    # 首页情绪分区候选 id 池的刷新间隔（秒），请求路径上只在内存中抽样
+    VIBE_SECTIONS_REFRESH_SECONDS: int = 600
+
+    # --- Resilience ---
+    # 熔断器：连续失败次数达到阈值后打开，经过 reset 秒放行一个探测请求
+    BREAKER_FAILURE_THRESHOLD: int = 5
+    BREAKER_RESET_SECONDS: float = 30.0
+
+    # --- Vector Backend ---
+    # "pgvector": 向量计算在 PostgreSQL 中完成（默认）
+    # "memory":   启动时把全部向量载入 NumPy 矩阵，检索/推荐走进程内矩阵乘
+    VECTOR_BACKEND: str = "pgvector"
+    # 刷新间隔：从数据库加载时为全量重读；使用快照时只检查 CURRENT 指针，可设得更短
+    VECTOR_INDEX_REFRESH_SECONDS: int = 3600
+    # 向量快照目录 (deploy_crawler/export_vector_snapshot.py 的输出)，为空则直接读数据库
+    VECTOR_SNAPSHOT_DIR: str = ""
 
     class Config:
         env_file = ".env"
@@ -4,12 +4,16 @@
 这是 VibeCheck 后端 API 使用的数据库层。
 Song 模型与 deploy_crawler/db_init.py 保持字段完全一致。
 """
-from sqlalchemy import Column, String, Text, DateTime, Boolean, func
-from sqlalchemy.orm import declarative_base
-from sqlalchemy.dialects.postgresql import JSONB
+import bisect
+import time
+from contextlib import asynccontextmanager
+
+from sqlalchemy import Column, String, Text, DateTime, Boolean, Computed, func
+from sqlalchemy.orm import declarative_base, deferred
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, REAL, TSVECTOR
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from pgvector.sqlalchemy import Vector
-from typing import AsyncGenerator
+from typing import AsyncGenerator, AsyncIterator
 
 from app.config import get_settings
 
@@ -33,6 +37,61 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+# 连接等待时间分桶上界（毫秒），用于按真实负载调整 pool_size / max_overflow
+_WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000)
+_pool_stats = {
+    "acquired": 0,
+    "wait_seconds": 0.0,
+    "max_wait_seconds": 0.0,
+    "hold_seconds": 0.0,
+    "max_hold_seconds": 0.0,
+    "wait_histogram": [0] * (len(_WAIT_BUCKETS_MS) + 1),
+}
+
+
+@asynccontextmanager
+async def session_scope() -> AsyncIterator[AsyncSession]:
+    """
+    短生命周期 Session：进入时立即从连接池取连接，退出即归还
+
+    服务层只在真正执行 SQL 时进入，等待 LLM / Embedding 期间不占用连接；
+    同时记录取连接的等待时间与占用时长。
+    """
+    async with AsyncSessionLocal() as session:
+        t0 = time.perf_counter()
+        await session.connection()
+        acquired = time.perf_counter()
+        wait = acquired - t0
+        _pool_stats["acquired"] += 1
+        _pool_stats["wait_seconds"] += wait
+        _pool_stats["max_wait_seconds"] = max(_pool_stats["max_wait_seconds"], wait)
+        _pool_stats["wait_histogram"][bisect.bisect_left(_WAIT_BUCKETS_MS, wait * 1000)] += 1
+        try:
+            yield session
+        finally:
+            hold = time.perf_counter() - acquired
+            _pool_stats["hold_seconds"] += hold
+            _pool_stats["max_hold_seconds"] = max(_pool_stats["max_hold_seconds"], hold)
+
+
+def get_pool_stats() -> dict:
+    """连接池占用情况与 session_scope 的等待 / 占用时间统计"""
+    pool = engine.sync_engine.pool
+    acquired = _pool_stats["acquired"]
+    labels = [f"<={b}ms" for b in _WAIT_BUCKETS_MS] + [f">{_WAIT_BUCKETS_MS[-1]}ms"]
+    return {
+        "pool_size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "acquired": acquired,
+        "avg_wait_ms": round(_pool_stats["wait_seconds"] / acquired * 1000, 2) if acquired else 0.0,
+        "max_wait_ms": round(_pool_stats["max_wait_seconds"] * 1000, 2),
+        "avg_hold_ms": round(_pool_stats["hold_seconds"] / acquired * 1000, 2) if acquired else 0.0,
+        "max_hold_ms": round(_pool_stats["max_hold_seconds"] * 1000, 2),
+        "wait_histogram": dict(zip(labels, _pool_stats["wait_histogram"])),
+    }
+
+
 # ---------- ORM Model ----------
 
 class Song(Base):
@@ -59,8 +118,47 @@ class Song(Base):
 
     # TF-IDF (JSONB 存储 Top-N 关键词 + 权重)
     tfidf_vector = Column(JSONB, comment="TF-IDF 关键词 (JSON)")
+    # 关键词集合 (GIN 索引) 与权重 L2 范数，只在推荐 SQL 中使用，见 migrations/007_add_tfidf_keywords.sql
+    tfidf_keywords = deferred(Column(ARRAY(Text), comment="TF-IDF 关键词集合"))
+    tfidf_norm = deferred(Column(REAL, comment="TF-IDF 关键词权重的 L2 范数"))
+
+    # 全文检索物化列 (STORED 生成列 + GIN 索引，见 migrations/002_add_search_tsv.sql)
+    # deferred：详情接口等整行查询不加载
+    search_tsv = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "to_tsvector('simple', title || ' ' || artist || ' ' || COALESCE(segmented_lyrics, ''))",
+            persisted=True,
+        ),
+        comment="标题+歌手+分词歌词的 tsvector",
+    ))
+    # 主标题 (STORED 生成列，规则与 app/services/dedupe.py::base_title 一致，见 migrations/008_add_base_title.sql)
+    # 推荐 / 搜索按它在 SQL 中 DISTINCT ON 去重同曲的不同版本
+    base_title = deferred(Column(
+        Text,
+        Computed(
+            "btrim(regexp_replace(regexp_replace(regexp_replace("
+            "title, '[(（\\[【][^)）\\]】]*[)）\\]】]', '', 'g'), "
+            "'(cover|live|remix|dj|翻唱|版|ver\\.?).*$', '', 'i'), "
+            "'\\s+.*$', ''))",
+            persisted=True,
+        ),
+        comment="去掉括号 / 版本后缀后的主标题",
+    ))
 
     album_cover = Column(String(500), nullable=True, comment="专辑封面 URL")
     is_duplicate = Column(Boolean, default=False, comment="是否为重复歌曲")
     created_at = Column(DateTime, default=func.now(), comment="创建时间")
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), comment="最后更新时间")
+
+
+class QueryCache(Base):
+    """
+    查询级缓存持久层 — 仅 API 使用 (建表见 migrations/003_create_query_cache.sql)
+    """
+    __tablename__ = "query_cache"
+
+    namespace = Column(String(32), primary_key=True, comment="缓存种类 (embedding / intent ...)")
+    cache_key = Column(Text, primary_key=True, comment="归一化后的查询 key")
+    value = Column(JSONB, nullable=False, comment="缓存值")
+    created_at = Column(DateTime, default=func.now(), nullable=False, comment="写入时间")
@@ -1,18 +1,61 @@
 """
 FastAPI 应用入口
 """
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import get_settings
-from app.routers import search, recommend, songs
+from app.routers import search, recommend, songs, metrics
+from app.services.data_version import refresh_data_generation
+from app.services.intent_matcher import refresh_catalog_dictionary
+from app.services.tokenizer import warm_up_tokenizer
+from app.services.vector_index import refresh_vector_index
+from app.services.vibe_sections import refresh_vibe_sections
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
 
+
+async def _run_periodically(job: Callable[[], Awaitable[None]], interval: int) -> None:
+    """后台定时任务：每隔 interval 秒执行一次 job，单次异常不影响后续执行"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await job()
+        except Exception as e:
+            logger.warning(f"Periodic job {job.__name__} failed: {type(e).__name__}: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """启动时预热内存数据，运行期间定时刷新"""
+    await warm_up_tokenizer()
+    await refresh_data_generation()
+    await refresh_catalog_dictionary()
+    await refresh_vibe_sections()
+    tasks = [
+        asyncio.create_task(_run_periodically(refresh_data_generation, settings.DATA_GENERATION_POLL_SECONDS)),
+        asyncio.create_task(_run_periodically(refresh_catalog_dictionary, settings.INTENT_DICT_REFRESH_SECONDS)),
+        asyncio.create_task(_run_periodically(refresh_vibe_sections, settings.VIBE_SECTIONS_REFRESH_SECONDS)),
+        # 内存向量索引加载较慢，放到后台进行，加载完成前检索自动走 SQL 路径
+        asyncio.create_task(refresh_vector_index()),
+        asyncio.create_task(_run_periodically(refresh_vector_index, settings.VECTOR_INDEX_REFRESH_SECONDS)),
+    ]
+    yield
+    for task in tasks:
+        task.cancel()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     description="基于 LLM 语义评语与 TF-IDF 的混合音乐推荐系统 API",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # CORS 跨域配置 (允许前端访问)
@@ -28,6 +71,7 @@ app.add_middleware(
 app.include_router(songs.router, prefix="/api", tags=["Songs"])
 app.include_router(search.router, prefix="/api", tags=["Search"])
 app.include_router(recommend.router, prefix="/api", tags=["Recommend"])
+app.include_router(metrics.router, prefix="/api", tags=["Metrics"])
 
 
 @app.get("/")
@@ -0,0 +1,56 @@
+"""
+运行指标接口
+"""
+from fastapi import APIRouter
+
+from app.database import get_pool_stats
+from app.services.embedding import get_embedding_cache_stats
+from app.services.intent_matcher import get_catalog_dictionary_stats
+from app.services.llm import get_intent_cache_stats
+from app.services.recommend import get_recommend_cache_stats
+from app.services.resilience import get_breaker_stats
+from app.services.search import get_search_cache_stats
+from app.services.singleflight import get_singleflight_stats
+from app.services.tokenizer import get_tokenizer_stats
+from app.services.vector_index import get_vector_index_stats
+from app.services.vibe_sections import get_vibe_section_stats
+
+router = APIRouter()
+
+
+@router.get("/metrics/cache")
+async def cache_metrics():
+    """各级缓存的命中统计（进程内计数，重启归零）"""
+    return {
+        "search": get_search_cache_stats(),
+        "embedding": get_embedding_cache_stats(),
+        "intent": get_intent_cache_stats(),
+        "recommend": get_recommend_cache_stats(),
+        "intent_matcher": get_catalog_dictionary_stats(),
+        "tokenizer": get_tokenizer_stats(),
+        "vibe_sections": get_vibe_section_stats(),
+    }
+
+
+@router.get("/metrics/singleflight")
+async def singleflight_metrics():
+    """各上游调用的 singleflight 合并次数与当前 in-flight 数"""
+    return get_singleflight_stats()
+
+
+@router.get("/metrics/breakers")
+async def breaker_metrics():
+    """LLM / Embedding 熔断器状态"""
+    return get_breaker_stats()
+
+
+@router.get("/metrics/db-pool")
+async def db_pool_metrics():
+    """数据库连接池占用与取连接等待时间分布"""
+    return get_pool_stats()
+
+
+@router.get("/metrics/vector-index")
+async def vector_index_metrics():
+    """内存向量索引状态（VECTOR_BACKEND=memory 时有效）"""
+    return get_vector_index_stats()
@@ -1,13 +1,14 @@
 """
 推荐接口
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query
 from sqlalchemy import select
 
-from app.database import get_db, Song
-from app.schemas import RecommendResponse, SongBase
-from app.services.recommend import get_similar_songs
+from app.database import Song, session_scope
+from app.schemas import BatchRecommendRequest, BatchRecommendResponse, RecommendResponse, SongBase
+from app.services.recommend import get_batch_recommendations, get_similar_songs
 
 router = APIRouter()
 
@@ -20,20 +21,28 @@ async def recommend_songs(
     w_lyrics: float = Query(0.4, ge=0.0, le=1.0, description="歌词向量权重"),
     w_tfidf: float = Query(0.1, ge=0.0, le=1.0, description="TF-IDF 关键词权重"),
     dedupe: bool = Query(False, description="是否按歌名去重"),
-    db: AsyncSession = Depends(get_db),
+    fusion: Literal["weighted", "rrf"] = Query("weighted", description="融合方式: weighted 加权求和 | rrf 名次融合"),
+    diversity: Optional[float] = Query(None, ge=0.0, le=1.0, description="MMR 多样性强度，0 为纯相关度"),
+    artist_cap: Optional[int] = Query(None, ge=1, le=50, description="同一歌手最多保留几首"),
 ):
     """
     基于单首歌曲推荐相似歌曲
 
     混合融合：review_vector + lyrics_vector + tfidf 关键词
     权重可动态调整，三者之和应为 1.0
+    fusion=rrf 时三路独立检索（并发）后按名次融合，权重作为各路的 RRF 权重
+    diversity / artist_cap：在候选池上做 MMR 多样性重排，减少同歌手 / 同专辑的近似歌曲
+    数据库连接只在各段 SQL 执行期间占用，不随整个请求持有
     """
-    result = await db.execute(select(Song).where(Song.id == song_id))
-    source = result.scalar_one_or_none()
+    async with session_scope() as db:
+        result = await db.execute(select(Song).where(Song.id == song_id))
+        source = result.scalar_one_or_none()
     if not source:
         raise HTTPException(status_code=404, detail="Song not found")
 
-    recommendations = await get_similar_songs(source, top_k, db, w_review, w_lyrics, w_tfidf, dedupe)
+    recommendations = await get_similar_songs(
+        source, top_k, w_review, w_lyrics, w_tfidf, dedupe, fusion, diversity, artist_cap
+    )
 
     return RecommendResponse(
         source_song=SongBase(
@@ -44,3 +53,33 @@ async def recommend_songs(
         ),
         recommendations=recommendations,
     )
+
+
+@router.post("/recommend/batch", response_model=BatchRecommendResponse)
+async def recommend_batch(request: BatchRecommendRequest):
+    """
+    多首种子歌曲的续播推荐（如当前播放队列）
+
+    以种子向量的质心做一次检索，返回排除种子、按歌名去重的单一列表；
+    不存在的 id 忽略，全部不存在时返回 404
+    """
+    song_ids = list(dict.fromkeys(request.song_ids))
+    async with session_scope() as db:
+        result = await db.execute(select(Song).where(Song.id.in_(song_ids)))
+        found = {song.id: song for song in result.scalars().all()}
+    seeds = [found[song_id] for song_id in song_ids if song_id in found]
+    if not seeds:
+        raise HTTPException(status_code=404, detail="Song not found")
+
+    recommendations = await get_batch_recommendations(
+        seeds, request.top_k,
+        request.w_review, request.w_lyrics, request.w_tfidf, request.dedupe,
+    )
+
+    return BatchRecommendResponse(
+        seed_songs=[
+            SongBase(id=seed.id, title=seed.title, artist=seed.artist, album_cover=seed.album_cover)
+            for seed in seeds
+        ],
+        recommendations=recommendations,
+    )
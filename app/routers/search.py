@@ -1,13 +1,16 @@
 """
 语义搜索接口
 """
-from typing import Optional
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.ext.asyncio import AsyncSession
+import json
+import logging
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
-from app.database import get_db
 from app.schemas import SearchResponse
-from app.services.search import perform_hybrid_search
+from app.services.search import InvalidCursor, perform_hybrid_search, stream_hybrid_search
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -17,7 +20,11 @@ async def search_songs(
     q: str = Query(..., min_length=1, max_length=200, description="自然语言搜索词"),
     top_k: int = Query(10, ge=1, le=50),
     mode: Optional[str] = Query(None, description="搜索模式: auto | vibe | lyrics | title | artist"),
-    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor，翻页时 q / mode 不生效"),
+    fusion: Literal["weighted", "rrf"] = Query("weighted", description="融合方式: weighted 加权求和 | rrf 名次融合"),
+    dedupe: bool = Query(False, description="是否按歌名去重（同曲多版本只保留一首）"),
+    diversity: Optional[float] = Query(None, ge=0.0, le=1.0, description="MMR 多样性强度，0 为纯相关度"),
+    artist_cap: Optional[int] = Query(None, ge=1, le=50, description="同一歌手最多保留几首"),
 ):
     """
     语义搜索歌曲
@@ -25,7 +32,51 @@ async def search_songs(
     mode=auto (默认): LLM 自动识别意图
     mode=vibe: 心情氛围，纯语义向量，跳过 LLM
     mode=lyrics: 搜歌词，歌词向量+关键词混合，跳过 LLM
-    mode=title: 搜歌名，title ILIKE 直接匹配，最快
-    mode=artist: 搜歌手，artist ILIKE 直接匹配，最快
+    mode=title: 搜歌名，title 子串 + trigram 相似度匹配（索引查找），最快
+    mode=artist: 搜歌手，artist 子串 + trigram 相似度匹配（索引查找），最快
+
+    fusion=rrf: review / lyrics / 关键词三路独立检索（并发），按名次融合
+
+    翻页：响应带 next_cursor 时传回 cursor 取下一页，直接读取暂存的排序列表
+    dedupe=true: 按主标题去重（songs.base_title），同一首歌的 Live / 翻唱 / DJ 版只保留排名最高的一首
+    diversity / artist_cap: 对完整结果列表做 MMR 多样性重排，减少同歌手 / 同专辑的近似歌曲
     """
-    return await perform_hybrid_search(q, top_k, db, mode=mode)
+    try:
+        return await perform_hybrid_search(
+            q, top_k, mode=mode, cursor=cursor, fusion=fusion,
+            dedupe=dedupe, diversity=diversity, artist_cap=artist_cap,
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Cursor expired or invalid")
+
+
+@router.get("/search/stream")
+async def search_songs_stream(
+    q: str = Query(..., min_length=1, max_length=200, description="自然语言搜索词"),
+    top_k: int = Query(10, ge=1, le=50),
+    mode: Optional[str] = Query(None, description="搜索模式: auto | vibe | lyrics | title | artist"),
+    fusion: Literal["weighted", "rrf"] = Query("weighted", description="融合方式: weighted 加权求和 | rrf 名次融合"),
+):
+    """
+    渐进式语义搜索 (Server-Sent Events)
+
+    按阶段推送事件，data 均为 SearchResponse JSON：
+      event: exact    — 精确 / 关键词命中（毫秒级）
+      event: semantic — 原句语义检索结果（Embedding 返回后）
+      event: final    — 最终排序，与 GET /search 一致，收到后流结束
+    出错时推送 event: error。
+    """
+    async def _event_iter():
+        try:
+            async for stage, response in stream_hybrid_search(q, top_k, mode=mode, fusion=fusion):
+                yield f"event: {stage}\ndata: {response.model_dump_json()}\n\n"
+        except Exception as e:
+            logger.warning(f"Streaming search failed for query '{q}': {type(e).__name__}: {e}")
+            yield f"event: error\ndata: {json.dumps({'detail': 'Search failed'})}\n\n"
+
+    return StreamingResponse(
+        _event_iter(),
+        media_type="text/event-stream",
+        # 关闭代理缓冲，保证事件即时送达
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -10,6 +10,8 @@ from sqlalchemy import func, select
 
 from app.database import get_db, Song
 from app.schemas import SongDetail, SongBase
+from app.services import vibe_sections
+from app.services.singleflight import SingleFlight
 
 # 噪音行关键词：包含任意一个则整句丢弃
 _NOISE_PATTERNS = [
@@ -37,6 +39,8 @@ _NETEASE_AUDIO_URL = "https://music.163.com/song/media/outer/url?id={song_id}.mp
 
 # LRC 缓存：最多 1000 首，24 小时过期
 _lrc_cache: TTLCache = TTLCache(maxsize=1000, ttl=86400)
+# 同一首歌的并发 LRC 请求只访问一次网易云
+_lrc_flight = SingleFlight("lrc")
 
 
 @router.get("/songs/random/list", response_model=list[SongBase])
@@ -56,43 +60,12 @@ async def get_random_songs(count: int = 12, db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/songs/vibe-sections")
-async def get_vibe_sections(per_section: int = 6, db: AsyncSession = Depends(get_db)):
+async def get_vibe_sections(per_section: int = 6):
     """
     首页情绪分区接口：按 vibe_tags 聚合，每个情绪区随机返回 N 首歌。
-    只返回有封面、有评语的高质量歌曲。
+    只返回有封面、有评语的高质量歌曲；候选 id 池常驻内存，见 app/services/vibe_sections.py。
     """
-    from sqlalchemy import text as sql_text
-
-    sections = []
-    for section in _VIBE_SECTIONS:
-        tag_conditions = " OR ".join(
-            [f"vibe_tags @> '[\"{ tag }\"]'::jsonb" for tag in section["tags"]]
-        )
-        sql = sql_text(f"""
-            SELECT id, title, artist, album_cover
-            FROM songs
-            WHERE is_duplicate = false
-              AND review_text IS NOT NULL
-              AND album_cover IS NOT NULL
-              AND vibe_tags IS NOT NULL
-              AND ({tag_conditions})
-            ORDER BY random()
-            LIMIT :limit
-        """)
-        result = await db.execute(sql, {"limit": per_section})
-        rows = result.fetchall()
-        if rows:
-            sections.append({
-                "key": section["key"],
-                "label": section["label"],
-                "emoji": section["emoji"],
-                "songs": [
-                    {"id": r.id, "title": r.title, "artist": r.artist, "album_cover": r.album_cover}
-                    for r in rows
-                ],
-            })
-
-    return sections
+    return await vibe_sections.get_vibe_sections(per_section)
 
 
 @router.get("/songs/{song_id}", response_model=SongDetail)
@@ -127,7 +100,11 @@ async def get_song_lrc(song_id: str, db: AsyncSession = Depends(get_db)):
     if song_id in _lrc_cache:
         return _lrc_cache[song_id]
 
-    # 从网易云 API 实时获取带时间戳的 LRC 歌词
+    return await _lrc_flight.do(song_id, lambda: _fetch_lrc(song_id))
+
+
+async def _fetch_lrc(song_id: str) -> dict:
+    """从网易云 API 实时获取带时间戳的 LRC 歌词，成功结果写入缓存"""
     try:
         async with httpx.AsyncClient(timeout=10) as client:
             resp = await client.get(
@@ -240,16 +217,3 @@ def _make_streaming_response(
         media_type=content_type,
         headers=headers,
     )
-
-
-# 首页情绪分区的 tag 分组配置
-_VIBE_SECTIONS = [
-    {"key": "late_night",  "label": "深夜独处", "emoji": "🌙", "tags": ["深夜", "孤独", "寂寞", "失眠", "孤寂"]},
-    {"key": "healing",     "label": "治愈解压", "emoji": "🌿", "tags": ["治愈", "温暖", "解压", "舒缓", "轻盈"]},
-    {"key": "love",        "label": "恋爱心动", "emoji": "💕", "tags": ["恋爱", "甜蜜", "心动", "暗恋", "浪漫"]},
-    {"key": "nostalgic",   "label": "怀旧回忆", "emoji": "📷", "tags": ["怀旧", "回忆", "青春", "遗憾", "思念"]},
-    {"key": "energy",      "label": "元气出发", "emoji": "⚡", "tags": ["活力", "励志", "热血", "元气", "积极"]},
-]
-
-
-
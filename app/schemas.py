@@ -1,7 +1,7 @@
 """
 Pydantic 响应/请求模型
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 
 
@@ -51,11 +51,33 @@ class SearchRequest(BaseModel):
 class SearchResponse(BaseModel):
     """搜索响应"""
     query: str
-    intent_type: str  # "vibe" | "lyrics" | "exact"
+    intent_type: str  # "vibe" | "lyrics" | "exact" | "lexical"
     results: list[SongSearchResult]
+    # 上游 (LLM / Embedding) 不可用时降级为纯关键词检索
+    degraded: bool = False
+    # 意图未经 LLM 确认（LLM 失败 / 熔断时的降级意图），结果可能与正常意图不同，不写响应缓存
+    provisional: bool = False
+    # 下一页游标（opaque），没有更多结果时为 None
+    next_cursor: Optional[str] = None
 
 
 class RecommendResponse(BaseModel):
     """推荐响应"""
     source_song: SongBase
     recommendations: list[SongSearchResult]
+
+
+class BatchRecommendRequest(BaseModel):
+    """多种子推荐请求（如当前播放队列）"""
+    song_ids: list[str] = Field(..., min_length=1, max_length=100)
+    top_k: int = Field(10, ge=1, le=50)
+    w_review: float = Field(0.5, ge=0.0, le=1.0)
+    w_lyrics: float = Field(0.4, ge=0.0, le=1.0)
+    w_tfidf: float = Field(0.1, ge=0.0, le=1.0)
+    dedupe: bool = True
+
+
+class BatchRecommendResponse(BaseModel):
+    """多种子推荐响应"""
+    seed_songs: list[SongBase]
+    recommendations: list[SongSearchResult]
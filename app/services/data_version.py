@@ -0,0 +1,37 @@
+"""
+数据版本号
+
+批处理脚本写入新数据后会把 data_generation.generation + 1
+(deploy_crawler/db_init.py::bump_data_generation)。
+API 进程定期轮询该值，缓存 key 带上版本号，数据更新后旧缓存不再命中；
+请求路径上只读内存中的版本号，不访问数据库。
+"""
+import logging
+
+from sqlalchemy import text as sql_text
+
+from app.database import session_scope
+
+logger = logging.getLogger(__name__)
+
+_generation = 0
+
+
+def current_generation() -> int:
+    """最近一次轮询到的数据版本号"""
+    return _generation
+
+
+async def refresh_data_generation() -> None:
+    """从 data_generation 表读取最新版本号，表不存在时保持不变"""
+    global _generation
+    try:
+        async with session_scope() as db:
+            result = await db.execute(sql_text("SELECT generation FROM data_generation WHERE id = 1"))
+            row = result.first()
+    except Exception as e:
+        logger.warning(f"Data generation refresh failed: {type(e).__name__}: {e}")
+        return
+    if row is not None and row.generation != _generation:
+        logger.info(f"Data generation changed: {_generation} -> {row.generation}")
+        _generation = row.generation
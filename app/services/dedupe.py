@@ -0,0 +1,54 @@
+"""
+同曲多版本去重（主标题）
+
+主标题规则：去掉括号内容、版本关键词 (cover / live / remix / dj / 翻唱 / 版 / ver) 及其后内容、
+第一个空白之后的内容。例如 "安和桥（DJ版）"、"安和桥 Live" 的主标题都是 "安和桥"。
+
+songs.base_title 是按同一规则 (regexp_replace) 计算的 STORED 生成列
+（app.database.Song.base_title，见 migrations/008_add_base_title.sql）：入库 / 改名时由数据库计算，
+推荐与搜索据此在 SQL 中 DISTINCT ON 去重，不再多取候选后逐条跑正则。base_title() 是 Python 版本，用于源歌曲标题与本地词典，
+修改规则时两边需同步。
+"""
+import re
+from typing import Iterable
+
+from sqlalchemy import text as sql_text
+
+from app.database import session_scope
+
+_BRACKET_RE = re.compile(r'[\(（\[【][^\)）\]】]*[\)）\]】]')
+_VERSION_RE = re.compile('(cover|live|remix|dj|翻唱|版|ver\\.?).*$', re.IGNORECASE)
+_SPACE_RE   = re.compile(r'\s+.*$')
+
+
+def base_title(title: str) -> str:
+    """提取主标题用于模糊去重"""
+    t = _BRACKET_RE.sub('', title)   # 安和桥（DJ版）  -> 安和桥
+    t = _VERSION_RE.sub('', t)       # 安和桥 Live     -> 安和桥
+    t = _SPACE_RE.sub('', t)         # 老男孩 筷子兄弟  -> 老男孩
+    return t.strip()
+
+
+async def distinct_base_titles(ids: list[str], exclude_titles: Iterable[str] = ()) -> list[str]:
+    """
+    按主标题去重一个已排序的 id 列表：每个主标题只保留排名最靠前的一首，
+    主标题在 exclude_titles 中的歌曲（如源歌曲的其他版本）整组去掉，保持原有顺序
+    """
+    if not ids:
+        return []
+    async with session_scope() as db:
+        result = await db.execute(
+            sql_text("""
+                SELECT id
+                FROM (
+                    SELECT DISTINCT ON (s.base_title) s.id, r.ord
+                    FROM unnest(CAST(:ids AS text[])) WITH ORDINALITY AS r(id, ord)
+                    JOIN songs s ON s.id = r.id
+                    WHERE s.base_title != ALL(CAST(:exclude_titles AS text[]))
+                    ORDER BY s.base_title, r.ord
+                ) d
+                ORDER BY ord
+            """),
+            {"ids": ids, "exclude_titles": list(exclude_titles)},
+        )
+        return [row.id for row in result.fetchall()]
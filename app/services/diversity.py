@@ -0,0 +1,111 @@
+"""
+MMR 多样性重排 (Maximal Marginal Relevance)
+
+推荐 / 搜索结果常被同一歌手、同一专辑的相似歌曲占满。这里在已排序的候选池上做贪心重排：
+  MMR(i) = λ · rel(i) - (1 - λ) · max_{j ∈ 已选} cos(i, j)，  λ = 1 - diversity
+  - rel 为候选原始分数 min-max 归一化到 0~1，与余弦相似度量纲一致
+  - 候选两两相似度由 review_vector 一次矩阵乘得到（内存索引已加载时直接取行，否则按 id 回表）
+  - artist_cap：同一歌手最多保留几首，可单独使用（diversity=0 时即按原顺序截断）
+候选池 200~500 首时矩阵乘 + 贪心选择只需几毫秒。
+"""
+import asyncio
+
+import numpy as np
+from sqlalchemy import text as sql_text
+
+from app.database import session_scope
+from app.schemas import SongSearchResult
+from app.services.vector_index import _parse_vector, get_vector_index
+
+
+def mmr_select(
+    relevance: np.ndarray, vectors: np.ndarray, diversity: float, limit: int,
+    artists: list[str] | None = None, artist_cap: int | None = None,
+) -> list[int]:
+    """贪心 MMR 选择，返回被选中候选的下标（按入选顺序）；vectors 需已按行 L2 归一化"""
+    n = len(relevance)
+    if n == 0 or limit <= 0:
+        return []
+    rel = np.asarray(relevance, dtype=np.float32)
+    span = float(rel.max() - rel.min())
+    rel = (rel - rel.min()) / span if span > 0 else np.ones(n, dtype=np.float32)
+    lam = 1.0 - diversity
+
+    sim = vectors @ vectors.T
+    max_sim = np.zeros(n, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+
+    artist_codes = counts = None
+    if artist_cap and artists is not None:
+        code_of: dict[str, int] = {}
+        artist_codes = np.array([code_of.setdefault(a, len(code_of)) for a in artists], dtype=np.int64)
+        counts = np.zeros(len(code_of), dtype=np.int64)
+
+    selected = []
+    while len(selected) < limit and available.any():
+        mmr = np.where(available, lam * rel - (1 - lam) * max_sim, -np.inf)
+        j = int(np.argmax(mmr))
+        selected.append(j)
+        available[j] = False
+        max_sim = np.maximum(max_sim, sim[j])
+        if artist_codes is not None:
+            code = artist_codes[j]
+            counts[code] += 1
+            if counts[code] >= artist_cap:
+                available &= artist_codes != code
+    return selected
+
+
+async def _review_vectors(ids: list[str]) -> np.ndarray:
+    """按 id 取归一化的 review 向量 (n, dim)，缺失的行为全 0"""
+    index = get_vector_index()
+    if index is not None:
+        rows = [index.row_of(song_id) for song_id in ids]
+        vectors = np.zeros((len(ids), index.review.shape[1]), dtype=np.float32)
+        hit = [i for i, row in enumerate(rows) if row is not None]
+        if hit:
+            vectors[hit] = index.review[[rows[i] for i in hit]]
+        return vectors
+
+    async with session_scope() as db:
+        result = await db.execute(
+            sql_text("SELECT id, review_vector FROM songs WHERE id = ANY(CAST(:ids AS text[]))"),
+            {"ids": ids},
+        )
+        found = {row.id: row.review_vector for row in result.fetchall() if row.review_vector is not None}
+
+    def _build():
+        dim = len(_parse_vector(next(iter(found.values())))) if found else 1
+        vectors = np.zeros((len(ids), dim), dtype=np.float32)
+        for i, song_id in enumerate(ids):
+            if song_id in found:
+                vectors[i] = _parse_vector(found[song_id])
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return np.divide(vectors, norms, out=vectors, where=norms > 0)
+
+    return await asyncio.to_thread(_build)
+
+
+async def diversify(
+    items: list[SongSearchResult], limit: int,
+    diversity: float | None = None, artist_cap: int | None = None,
+) -> list[SongSearchResult]:
+    """
+    对已按 score 排序的候选做 MMR 重排并截取 limit 条
+
+    diversity=None / 0 且未设 artist_cap 时原样截断；只设 artist_cap 时不加载向量
+    """
+    diversity = diversity or 0.0
+    if not items or (diversity <= 0 and not artist_cap):
+        return items[:limit]
+
+    relevance = np.array([item.score for item in items], dtype=np.float32)
+    if diversity > 0:
+        vectors = await _review_vectors([item.id for item in items])
+    else:
+        vectors = np.zeros((len(items), 1), dtype=np.float32)
+    selected = await asyncio.to_thread(
+        mmr_select, relevance, vectors, diversity, limit,
+        [item.artist for item in items], artist_cap,
+    )
+    return [items[i] for i in selected]
@@ -3,16 +3,41 @@ Embedding 服务 - 调用硅基流动 BAAI/bge-m3
 
 封装向量化调用逻辑，供搜索和推荐服务使用。
 使用 httpx.AsyncClient 避免阻塞 FastAPI 事件循环。
+
+查询向量缓存：
+  1. 进程内 TTLCache（LRU 淘汰），key = (模型名, 归一化文本)
+  2. 可选 PostgreSQL 持久层 (EMBEDDING_CACHE_PERSIST)，重启后仍可命中，多 worker 共享
+
+上游请求微批合并：EMBEDDING_BATCH_WINDOW_MS 内到达的未命中文本（最多 EMBEDDING_BATCH_MAX 条）
+合并为一次 list input 请求，与爬虫侧 get_embeddings_batch 的调用方式一致。
+
+上游请求经熔断器保护，并受请求截止时间约束；失败统一抛出 UpstreamUnavailable，
+由搜索服务降级为纯关键词检索。
 """
+import asyncio
 import logging
+import time
 
 import httpx
+from cachetools import TTLCache
 
 from app.config import get_settings
+from app.services.query_cache import CacheStats, load_persistent, normalize_query, save_persistent
+from app.services.resilience import CircuitBreaker, UpstreamUnavailable, with_deadline
+from app.services.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# 查询向量缓存：热门搜索词（"深夜 孤独"、"下雨天"）无需重复请求硅基流动
+_embedding_cache: TTLCache = TTLCache(
+    maxsize=settings.EMBEDDING_CACHE_SIZE, ttl=settings.EMBEDDING_CACHE_TTL
+)
+_embedding_stats = CacheStats()
+# 缓存未命中的相同查询并发到达时，只发起一次上游请求
+_embedding_flight = SingleFlight("embedding")
+_embedding_breaker = CircuitBreaker("embedding")
+
 # 复用连接池，避免每次请求都建立新连接
 _async_client: httpx.AsyncClient | None = None
 
@@ -21,27 +46,35 @@ def _get_client() -> httpx.AsyncClient:
     """懒加载单例 AsyncClient（自带连接池）"""
     global _async_client
     if _async_client is None:
-        _async_client = httpx.AsyncClient(timeout=15)
+        _async_client = httpx.AsyncClient(timeout=settings.EMBEDDING_TIMEOUT)
     return _async_client
 
 
-async def get_embedding(text: str) -> list[float]:
-    """
-    将文本转为 1024 维向量 (BAAI/bge-m3)
+def embedding_available() -> bool:
+    """Embedding 熔断器未打开（搜索据此决定是否直接降级）"""
+    return not _embedding_breaker.is_open
 
-    Args:
-        text: 待向量化的文本（建议 < 1500 字符）
 
-    Returns:
-        1024 维 float 列表
-    """
+def get_embedding_cache_stats() -> dict:
+    """查询向量缓存的命中统计"""
+    return {
+        **_embedding_stats.snapshot(),
+        "size": len(_embedding_cache),
+        "maxsize": _embedding_cache.maxsize,
+        "persistent": settings.EMBEDDING_CACHE_PERSIST,
+        "batching": _batcher.stats(),
+    }
+
+
+async def _request_embeddings(texts: list[str]) -> list[list[float]]:
+    """直接调用硅基流动 Embedding API（不经过缓存），返回顺序与 texts 一致"""
     headers = {
         "Authorization": f"Bearer {settings.GUIJI_API_KEY}",
         "Content-Type": "application/json",
     }
     payload = {
         "model": settings.GUIJI_EMB_MODEL,
-        "input": text[:1500],
+        "input": texts,
         "encoding_format": "float",
     }
 
@@ -50,4 +83,141 @@ async def get_embedding(text: str) -> list[float]:
         settings.GUIJI_EMB_URL, headers=headers, json=payload
     )
     resp.raise_for_status()
-    return resp.json()["data"][0]["embedding"]
+    data = sorted(resp.json()["data"], key=lambda item: item.get("index", 0))
+    if len(data) != len(texts):
+        raise ValueError(f"Embedding API returned {len(data)} vectors for {len(texts)} inputs")
+    return [item["embedding"] for item in data]
+
+
+async def _call_upstream(texts: list[str]) -> list[list[float]]:
+    """经熔断器发起一次上游请求：熔断打开时抛出 CircuitOpenError，成功 / 失败各记录一次"""
+    return await _embedding_breaker.call(lambda: _request_embeddings(texts))
+
+
+class _EmbeddingBatcher:
+    """
+    收集短窗口内的并发请求，合并为一次批量调用
+
+    第一条请求到达时启动 window 计时，窗口到期或攒满 max_size 条即发送；
+    每个调用者各自等待自己的 Future，整批失败时异常传给该批所有调用者。
+    熔断器按上游请求（而不是按调用者）记录一次成功 / 失败；上游请求在独立 Task 中执行，
+    调用者超时或取消不会中断它，请求本身受 AsyncClient 的 EMBEDDING_TIMEOUT 约束。
+    """
+
+    def __init__(self, window_ms: float, max_size: int):
+        self.window = window_ms / 1000
+        self.max_size = max(1, max_size)
+        self.batches = 0
+        self.texts = 0
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._sending: set[asyncio.Task] = set()
+
+    async def submit(self, text: str) -> list[float]:
+        if self.window <= 0:
+            self.batches += 1
+            self.texts += 1
+            task = asyncio.ensure_future(_call_upstream([text]))
+            # 调用者已放弃等待时，避免 "exception was never retrieved" 警告
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            return (await asyncio.shield(task))[0]
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._send(batch))
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        self.batches += 1
+        self.texts += len(batch)
+        try:
+            vectors = await _call_upstream([text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "avg_batch_size": round(self.texts / self.batches, 2) if self.batches else 0.0,
+            "window_ms": self.window * 1000,
+            "max_size": self.max_size,
+        }
+
+
+_batcher = _EmbeddingBatcher(settings.EMBEDDING_BATCH_WINDOW_MS, settings.EMBEDDING_BATCH_MAX)
+
+
+async def get_embedding(text: str) -> list[float]:
+    """
+    将文本转为 1024 维向量 (BAAI/bge-m3)，优先命中查询向量缓存
+
+    Args:
+        text: 待向量化的文本（建议 < 1500 字符）
+
+    Returns:
+        1024 维 float 列表
+
+    Raises:
+        UpstreamUnavailable: 熔断打开、超时或上游请求失败
+    """
+    # 归一化只用于缓存 key，上游仍对用户原文做向量化
+    text = text[:1500]
+    normalized = normalize_query(text)
+    cache_key = (settings.GUIJI_EMB_MODEL, normalized)
+
+    cached = _embedding_cache.get(cache_key)
+    if cached is not None:
+        _embedding_stats.hits += 1
+        return cached
+
+    return await _embedding_flight.do(cache_key, lambda: _load_embedding(text, cache_key))
+
+
+async def _load_embedding(text: str, cache_key: tuple[str, str]) -> list[float]:
+    """进程内缓存未命中：依次尝试持久层、上游 API，并回填缓存"""
+    persist_key = f"{settings.GUIJI_EMB_MODEL}:{cache_key[1]}"
+    if settings.EMBEDDING_CACHE_PERSIST:
+        cached = await load_persistent("embedding", persist_key, settings.EMBEDDING_CACHE_TTL)
+        if cached is not None:
+            _embedding_stats.persistent_hits += 1
+            _embedding_cache[cache_key] = cached
+            return cached
+
+    _embedding_stats.misses += 1
+    t0 = time.perf_counter()
+    try:
+        # 这里只约束本调用者的等待时间；熔断器由上游请求自身的结果记录（见 _EmbeddingBatcher）
+        embedding = await with_deadline(_batcher.submit(text), settings.EMBEDDING_TIMEOUT)
+    except UpstreamUnavailable:
+        raise
+    except Exception as e:
+        raise UpstreamUnavailable(f"embedding request failed: {type(e).__name__}: {e}") from e
+    finally:
+        _embedding_stats.upstream_seconds += time.perf_counter() - t0
+
+    _embedding_cache[cache_key] = embedding
+    if settings.EMBEDDING_CACHE_PERSIST:
+        save_persistent("embedding", persist_key, embedding)
+    return embedding
@@ -0,0 +1,89 @@
+"""
+Reciprocal Rank Fusion (fusion=rrf)
+
+每路信号独立检索 Top-N 排名列表，按 Σ w_i / (k + rank_i) 合并：
+  - 只依赖名次，余弦相似度、ts_rank、TF-IDF 加权余弦等量纲不同的分数无需归一化
+  - 每路都是单索引探测（HNSW / GIN），可在各自的连接上并发执行，
+    总耗时取决于最慢的一路而不是全表融合计算
+
+搜索与推荐共用这里的排名检索与合并逻辑。
+"""
+import asyncio
+
+import numpy as np
+from sqlalchemy import text as sql_text
+
+from app.database import session_scope
+from app.services.vector_index import VectorIndex
+
+# 允许参与排名检索的向量列（拼接进 SQL，只接受这里的常量）
+_VECTOR_COLUMNS = ("review_vector", "lyrics_vector")
+
+
+def rrf_merge(ranked_lists: list[tuple[list[str], float]], k: int) -> list[tuple[str, float]]:
+    """合并多路 (排名列表, 权重)，返回按 RRF 分降序的 (id, score)；权重 <= 0 的路忽略"""
+    scores: dict[str, float] = {}
+    for ids, weight in ranked_lists:
+        if weight <= 0:
+            continue
+        for rank, song_id in enumerate(ids, start=1):
+            scores[song_id] = scores.get(song_id, 0.0) + weight / (k + rank)
+    return sorted(scores.items(), key=lambda x: x[1], reverse=True)
+
+
+async def no_ranks() -> list[str]:
+    """权重为 0 的一路不检索，用空排名占位"""
+    return []
+
+
+def rrf_max_score(weights: list[float], k: int) -> float:
+    """所有路都排第一时的 RRF 分，用于把分数归一化到 0~1"""
+    return sum(w for w in weights if w > 0) / (k + 1)
+
+
+async def vector_rank_ids(
+    column: str, vec: list[float], pool: int, exclude_id: str | None = None,
+) -> list[str]:
+    """单列 HNSW 近邻检索，返回按距离升序的 id（独立连接，可与其他路并发）"""
+    if column not in _VECTOR_COLUMNS:
+        raise ValueError(f"Unsupported vector column: {column}")
+    async with session_scope() as db:
+        # HNSW 单次扫描最多返回 ef_search 条（仅当前事务生效）
+        await db.execute(
+            sql_text("SELECT set_config('hnsw.ef_search', :ef, true)"),
+            {"ef": str(max(pool, 40))},
+        )
+        result = await db.execute(
+            sql_text(f"""
+                SELECT id
+                FROM songs
+                WHERE {column} IS NOT NULL
+                  AND is_duplicate = false
+                  AND id != :exclude_id
+                ORDER BY {column} <=> CAST(:vec AS vector)
+                LIMIT :pool
+            """),
+            {"vec": str(vec), "pool": pool, "exclude_id": exclude_id or ""},
+        )
+        return [row.id for row in result.fetchall()]
+
+
+async def memory_rank_ids(
+    index: VectorIndex, review_q: list[float], lyrics_q: list[float] | None,
+    pool: int, exclude_id: str | None = None,
+) -> tuple[list[str], list[str]]:
+    """内存向量后端：一次矩阵乘得到 review / lyrics 两路排名（线程池中执行）"""
+    def _rank():
+        review_sim, lyrics_sim = index.similarities(review_q, lyrics_q)
+        review_sim = np.where(index.active, review_sim, -np.inf)
+        # 无歌词向量的行存的是全 0，不参与 lyrics 排名
+        lyrics_sim = np.where(index.active & (lyrics_sim != 0), lyrics_sim, -np.inf)
+        exclude_row = index.row_of(exclude_id) if exclude_id else None
+        if exclude_row is not None:
+            review_sim[exclude_row] = lyrics_sim[exclude_row] = -np.inf
+        return (
+            [index.ids[i] for i in index.top_indices(review_sim, pool)],
+            [index.ids[i] for i in index.top_indices(lyrics_sim, pool)],
+        )
+
+    return await asyncio.to_thread(_rank)
@@ -0,0 +1,157 @@
+"""
+本地意图快速通道
+
+大部分 exact 类查询就是曲库中已有的歌手名或歌名。启动时把全部歌手名和
+主标题 (base_title) 载入内存词典，auto 模式下先在本地匹配：
+
+  1. 整句命中歌手名            → {"artist": ..., "type": "exact"}
+  2. 整句命中歌名              → {"title": ...,  "type": "exact"}
+  3. 歌手 + 歌名 / 歌名 + 歌手 → 两者都填（需曲库中确有该组合）
+
+只在无歧义时返回结果，否则交给 LLM 解析。词典由 main.py 的后台任务定期刷新，
+刷新时歌手名 / 歌名也会加入 jieba 用户词典。
+"""
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy import text as sql_text
+
+from app.config import get_settings
+from app.database import session_scope
+from app.services.dedupe import base_title
+from app.services.query_cache import normalize_query
+from app.services.tokenizer import load_catalog_words
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# 多歌手合唱的分隔符：周杰伦/费玉清、A & B
+_ARTIST_SPLIT_RE = re.compile(r"\s*[/&、,，]\s*")
+# 匹配前剔除的标点与书名号：周杰伦《晴天》、周杰伦 - 晴天
+_PUNCT_RE = re.compile(r"[\s《》「」『』“”\"'‘’\-—–·:：.。!！?？]+")
+# 歌手与歌名之间允许的连接词：周杰伦的晴天
+_CONNECTORS = ("的", "之")
+
+
+def _key(text: str) -> str:
+    """词典 key：归一化后去掉空白与标点"""
+    return _PUNCT_RE.sub("", normalize_query(text))
+
+
+@dataclass
+class _CatalogDictionary:
+    artists: dict[str, str] = field(default_factory=dict)          # key -> 歌手名
+    titles: dict[str, str] = field(default_factory=dict)           # key -> 主标题
+    title_artist_count: dict[str, int] = field(default_factory=dict)
+    pairs: set[tuple[str, str]] = field(default_factory=set)       # (artist_key, title_key)
+    loaded_at: float = 0.0
+
+
+_dictionary = _CatalogDictionary()
+_stats = {"hits": 0, "misses": 0}
+
+
+def _build_dictionary(rows: list[tuple[str, str]]) -> _CatalogDictionary:
+    """根据 (title, artist) 列表构建词典（CPU 密集，在线程池中执行）"""
+    d = _CatalogDictionary(loaded_at=time.time())
+    title_artists: dict[str, set[str]] = {}
+    for title, artist in rows:
+        title_base = base_title(title or "")
+        title_key = _key(title_base)
+        if len(title_key) >= 2:
+            d.titles.setdefault(title_key, title_base)
+            title_artists.setdefault(title_key, set()).add(_key(artist or ""))
+        for name in _ARTIST_SPLIT_RE.split(artist or ""):
+            artist_key = _key(name)
+            if len(artist_key) < 2:
+                continue
+            d.artists.setdefault(artist_key, name.strip())
+            if len(title_key) >= 2:
+                d.pairs.add((artist_key, title_key))
+    d.title_artist_count = {k: len(v) for k, v in title_artists.items()}
+    return d
+
+
+async def refresh_catalog_dictionary() -> None:
+    """从 songs 表重新加载歌手 / 歌名词典，失败时保留旧词典"""
+    global _dictionary
+    try:
+        async with session_scope() as db:
+            result = await db.execute(sql_text("""
+                SELECT DISTINCT title, artist
+                FROM songs
+                WHERE is_duplicate = false
+            """))
+            rows = [(r.title, r.artist) for r in result.fetchall()]
+    except Exception as e:
+        logger.warning(f"Catalog dictionary refresh failed: {type(e).__name__}: {e}")
+        return
+
+    _dictionary = await asyncio.to_thread(_build_dictionary, rows)
+    logger.info(
+        f"Catalog dictionary loaded: {len(_dictionary.artists)} artists, "
+        f"{len(_dictionary.titles)} titles"
+    )
+    # 歌手名 / 歌名同时作为 jieba 用户词典，关键词召回的分词与曲库保持一致
+    await load_catalog_words([*_dictionary.artists.values(), *_dictionary.titles.values()])
+
+
+def get_catalog_dictionary_stats() -> dict:
+    """本地意图词典的规模与命中统计"""
+    return {
+        **_stats,
+        "artists": len(_dictionary.artists),
+        "titles": len(_dictionary.titles),
+        "loaded_at": _dictionary.loaded_at or None,
+    }
+
+
+def _match_pair(d: _CatalogDictionary, q: str) -> tuple[str, str] | None:
+    """把查询拆成 歌手+歌名 或 歌名+歌手，唯一命中时返回 (artist_key, title_key)"""
+    matches: set[tuple[str, str]] = set()
+    for i in range(2, len(q) - 1):
+        head, tail = q[:i], q[i:]
+        for connector in _CONNECTORS:
+            if tail.startswith(connector) and len(tail) > len(connector) + 1:
+                if (head, tail[len(connector):]) in d.pairs:
+                    matches.add((head, tail[len(connector):]))
+        if (head, tail) in d.pairs:
+            matches.add((head, tail))
+        if (tail, head) in d.pairs:
+            matches.add((tail, head))
+    return matches.pop() if len(matches) == 1 else None
+
+
+def match_exact_intent(query: str) -> dict | None:
+    """
+    在本地词典中匹配查询，无歧义命中时返回 exact 意图，否则返回 None
+
+    返回格式与 llm.parse_search_intent 一致
+    """
+    d = _dictionary
+    q = _key(query)
+    if len(q) < 2 or not d.artists:
+        return None
+
+    is_artist = q in d.artists
+    # 歌名被太多不同歌手使用时（"下雨天"、"孤独"）更可能是氛围描述，交给 LLM
+    is_title = q in d.titles and d.title_artist_count.get(q, 0) <= settings.INTENT_MATCH_MAX_TITLE_ARTISTS
+
+    intent = None
+    if is_artist and not is_title:
+        intent = {"artist": d.artists[q], "title": None}
+    elif is_title and not is_artist:
+        intent = {"artist": None, "title": d.titles[q]}
+    elif not is_artist and q not in d.titles:
+        pair = _match_pair(d, q)
+        if pair:
+            intent = {"artist": d.artists[pair[0]], "title": d.titles[pair[1]]}
+
+    if intent is None:
+        _stats["misses"] += 1
+        return None
+    _stats["hits"] += 1
+    return {**intent, "vibe": query, "type": "exact"}
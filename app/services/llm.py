@@ -7,12 +7,26 @@ LLM 服务 - 调用 LongMao (LongCat-Flash-Chat)
 """
 import json
 import logging
+import time
+from cachetools import LRUCache
 from openai import AsyncOpenAI
 from app.config import get_settings
+from app.services.query_cache import CacheStats, load_persistent, normalize_query, save_persistent
+from app.services.resilience import CircuitBreaker, CircuitOpenError, with_deadline
+from app.services.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+_INTENT_KEYS = ("artist", "title", "vibe", "type")
+
+# 意图解析缓存：key 为归一化后的查询，重复的 auto 搜索不再调用 LLM
+_intent_cache: LRUCache = LRUCache(maxsize=settings.INTENT_CACHE_SIZE)
+_intent_stats = CacheStats()
+# 相同查询并发到达时只调用一次 LLM
+_intent_flight = SingleFlight("intent")
+_llm_breaker = CircuitBreaker("llm")
+
 _client: AsyncOpenAI | None = None
 
 
@@ -22,22 +36,30 @@ def _get_client() -> AsyncOpenAI:
         _client = AsyncOpenAI(
             api_key=settings.LONGMAO_API_KEY,
             base_url=settings.LONGMAO_BASE_URL,
+            timeout=settings.LLM_TIMEOUT,
+            # 不在客户端重试：失败交给熔断器统计，调用方走降级
+            max_retries=0,
         )
     return _client
 
 
-async def parse_search_intent(query: str) -> dict:
-    """
-    使用 LLM 解析用户搜索意图（异步，不阻塞事件循环）
+def get_intent_cache_stats() -> dict:
+    """意图解析缓存的命中统计"""
+    return {
+        **_intent_stats.snapshot(),
+        "size": len(_intent_cache),
+        "maxsize": _intent_cache.maxsize,
+        "persistent": settings.INTENT_CACHE_PERSIST,
+    }
 
-    Returns:
-        {
-            "artist": str | None,
-            "title": str | None,
-            "vibe": str,         # 纯化后的情感/场景描述
-            "type": "exact" | "lyrics" | "vibe"
-        }
-    """
+
+def _fallback_intent(query: str) -> dict:
+    """LLM 不可用时的降级意图：纯 vibe 搜索（不写缓存，fallback 标记供搜索响应缓存识别）"""
+    return {"artist": None, "title": None, "vibe": query, "type": "vibe", "fallback": True}
+
+
+async def _request_intent(query: str) -> dict | None:
+    """调用 LLM 解析意图，失败、超时或熔断打开时返回 None"""
     prompt = f"""你是一个音乐搜索意图解析引擎。请将用户的输入拆解为 JSON 格式。
 输入："{query}"
 要求：
@@ -49,18 +71,76 @@ async def parse_search_intent(query: str) -> dict:
 
     try:
         client = _get_client()
-        response = await client.chat.completions.create(
-            model=settings.LONGMAO_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"},
-        )
+        response = await _llm_breaker.call(lambda: with_deadline(
+            client.chat.completions.create(
+                model=settings.LONGMAO_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                response_format={"type": "json_object"},
+            ),
+            settings.LLM_TIMEOUT,
+        ))
         result = json.loads(response.choices[0].message.content)
         logger.info(f"LLM intent parsed: query='{query}' -> type={result.get('type')}, vibe={result.get('vibe')}")
-        return result
+    except CircuitOpenError:
+        return None
     except json.JSONDecodeError as e:
         logger.warning(f"LLM returned invalid JSON for query '{query}': {e}")
-        return {"artist": None, "title": None, "vibe": query, "type": "vibe"}
+        return None
     except Exception as e:
         # LLM 不可用时降级为纯 vibe 搜索
         logger.warning(f"LLM intent parsing failed, falling back to vibe mode: {type(e).__name__}: {e}")
-        return {"artist": None, "title": None, "vibe": query, "type": "vibe"}
+        return None
+
+    if not isinstance(result, dict):
+        logger.warning(f"LLM returned non-object intent for query '{query}': {result!r}")
+        return None
+    return {key: result.get(key) for key in _INTENT_KEYS}
+
+
+async def parse_search_intent(query: str) -> dict:
+    """
+    使用 LLM 解析用户搜索意图（异步，不阻塞事件循环）
+
+    相同查询（归一化后）优先命中进程内 LRU，其次命中 query_cache 持久表，
+    都未命中才调用 LLM；LLM 失败时的降级结果不写缓存。
+
+    Returns:
+        {
+            "artist": str | None,
+            "title": str | None,
+            "vibe": str,         # 纯化后的情感/场景描述
+            "type": "exact" | "lyrics" | "vibe"
+        }
+    """
+    cache_key = normalize_query(query)
+
+    cached = _intent_cache.get(cache_key)
+    if cached is not None:
+        _intent_stats.hits += 1
+        return dict(cached)
+
+    result = await _intent_flight.do(cache_key, lambda: _load_intent(query, cache_key))
+    return dict(result)
+
+
+async def _load_intent(query: str, cache_key: str) -> dict:
+    """进程内缓存未命中：依次尝试持久层、LLM，成功结果回填缓存"""
+    if settings.INTENT_CACHE_PERSIST:
+        cached = await load_persistent("intent", cache_key, settings.INTENT_CACHE_TTL)
+        if cached is not None:
+            _intent_stats.persistent_hits += 1
+            _intent_cache[cache_key] = cached
+            return cached
+
+    _intent_stats.misses += 1
+    t0 = time.perf_counter()
+    result = await _request_intent(query)
+    _intent_stats.upstream_seconds += time.perf_counter() - t0
+
+    if result is None:
+        return _fallback_intent(query)
+
+    _intent_cache[cache_key] = result
+    if settings.INTENT_CACHE_PERSIST:
+        save_persistent("intent", cache_key, result)
+    return result
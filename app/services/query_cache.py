@@ -0,0 +1,100 @@
+"""
+查询级缓存工具
+
+供 embedding / LLM 意图等"同一查询反复出现"的上游调用复用：
+  1. normalize_query — 缓存 key 归一化
+  2. CacheStats      — 命中 / 未命中计数，估算节省的上游耗时
+  3. query_cache 表  — 可选的 PostgreSQL 持久层，重启不丢、多 worker 共享
+     (建表见 deploy_crawler/migrations/003_create_query_cache.sql)
+"""
+import asyncio
+import json
+import logging
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import text as sql_text
+
+from app.database import session_scope
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# 后台写入任务的强引用，防止被 GC 提前回收
+_pending_writes: set[asyncio.Task] = set()
+
+
+def normalize_query(text: str) -> str:
+    """缓存 key 归一化：全角转半角、合并连续空白、去首尾空白、英文小写"""
+    text = unicodedata.normalize("NFKC", text)
+    return _WHITESPACE_RE.sub(" ", text).strip().lower()
+
+
+@dataclass
+class CacheStats:
+    """单个缓存的命中统计（进程内）"""
+    hits: int = 0
+    persistent_hits: int = 0
+    misses: int = 0
+    upstream_seconds: float = 0.0
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.persistent_hits + self.misses
+        avg_upstream_ms = self.upstream_seconds / self.misses * 1000 if self.misses else 0.0
+        return {
+            "hits": self.hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.persistent_hits) / lookups, 4) if lookups else 0.0,
+            "avg_upstream_ms": round(avg_upstream_ms, 1),
+            # 命中次数 × 平均上游耗时，近似为缓存省下的等待时间
+            "saved_ms_estimate": round((self.hits + self.persistent_hits) * avg_upstream_ms, 1),
+        }
+
+
+async def load_persistent(namespace: str, key: str, ttl: int) -> Any | None:
+    """从 query_cache 表读取未过期的缓存值，表不存在或数据库异常时返回 None"""
+    try:
+        async with session_scope() as db:
+            result = await db.execute(
+                sql_text("""
+                    SELECT value
+                    FROM query_cache
+                    WHERE namespace = :namespace
+                      AND cache_key = :key
+                      AND created_at > now() - make_interval(secs => :ttl)
+                """),
+                {"namespace": namespace, "key": key, "ttl": ttl},
+            )
+            row = result.first()
+    except Exception as e:
+        logger.warning(f"Persistent cache read failed ({namespace}): {type(e).__name__}: {e}")
+        return None
+    return row.value if row else None
+
+
+async def _write_persistent(namespace: str, key: str, value: Any) -> None:
+    try:
+        async with session_scope() as db:
+            await db.execute(
+                sql_text("""
+                    INSERT INTO query_cache (namespace, cache_key, value, created_at)
+                    VALUES (:namespace, :key, CAST(:value AS jsonb), now())
+                    ON CONFLICT (namespace, cache_key)
+                    DO UPDATE SET value = EXCLUDED.value, created_at = EXCLUDED.created_at
+                """),
+                {"namespace": namespace, "key": key, "value": json.dumps(value, ensure_ascii=False)},
+            )
+            await db.commit()
+    except Exception as e:
+        logger.warning(f"Persistent cache write failed ({namespace}): {type(e).__name__}: {e}")
+
+
+def save_persistent(namespace: str, key: str, value: Any) -> None:
+    """后台写入 query_cache 表，不阻塞当前请求"""
+    task = asyncio.create_task(_write_persistent(namespace, key, value))
+    _pending_writes.add(task)
+    task.add_done_callback(_pending_writes.discard)
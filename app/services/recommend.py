@@ -4,142 +4,651 @@
 基于已入库歌曲的向量，计算最相似的 Top-K 歌曲。
 
 融合公式：
-  FinalScore = 0.5 * Sim_review + 0.4 * Sim_lyrics + 0.1 * TF-IDF_overlap
+  FinalScore = 0.5 * Sim_review + 0.4 * Sim_lyrics + 0.1 * Sim_tfidf
+  Sim_tfidf 为 TF-IDF 关键词权重的加权余弦相似度
 """
-import re
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+
+import numpy as np
 from cachetools import TTLCache
 from sqlalchemy import text as sql_text
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import ProgrammingError
 
-from app.database import Song
+from app.config import get_settings
+from app.database import Song, session_scope
 from app.schemas import SongSearchResult
+from app.services.data_version import current_generation
+from app.services.dedupe import base_title, distinct_base_titles
+from app.services.diversity import diversify
+from app.services.fusion import memory_rank_ids, no_ranks, rrf_max_score, rrf_merge, vector_rank_ids
+from app.services.query_cache import CacheStats
+from app.services.singleflight import SingleFlight
+from app.services.vector_index import VectorIndex, get_vector_index
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
 
-# 推荐缓存：最多 500 首，10 小时过期
+# song_neighbors 表中的分数按此权重离线计算，只有请求权重一致时才能直接使用
+_PRECOMPUTED_WEIGHTS = (0.5, 0.4, 0.1)
+
+# 推荐缓存：最多 500 首，10 小时过期；key 带数据版本号，批处理 / 邻居重算后旧列表不再命中
 _recommend_cache: TTLCache = TTLCache(maxsize=500, ttl=36000)
 
-# 模糊去重用的正则：去掉括号内容、版本关键词、空格后内容，提取主标题
-_BRACKET_RE = re.compile(r'[\(\uff08\[\u3010][^\)\uff09\]\u3011]*[\)\uff09\]\u3011]')
-_VERSION_RE = re.compile('(cover|live|remix|dj|\u7ffb\u5531|\u7248|ver\\.?).*$', re.IGNORECASE)
-_SPACE_RE   = re.compile(r'\s+.*$')
+# 三路原始分缓存 (fusion=weighted)：key 为 (数据版本号, 源歌曲 id)，与权重无关
+_subscore_cache: TTLCache = TTLCache(maxsize=500, ttl=36000)
+_subscore_stats = CacheStats()
+_subscore_flight = SingleFlight("recommend_subscores")
+
+# TF-IDF 加权余弦：Σ w_src(k) · w_cand(k) / (|src| · |cand|)
+#   - tfidf_keywords && 源关键词 先做数组交集预筛（GIN 可用），无交集的行直接为 0
+#   - 只遍历源歌曲的关键词，候选权重由 tfidf_vector ->> key 直接取出，不再逐行展开 jsonb
+_TFIDF_SIM_SQL = """
+    CASE WHEN tfidf_keywords && CAST(:src_tfidf_keys AS text[]) THEN
+        COALESCE(
+            (
+                SELECT SUM(src.weight * (tfidf_vector ->> src.key)::float)
+                FROM unnest(
+                    CAST(:src_tfidf_keys AS text[]),
+                    CAST(:src_tfidf_weights AS float8[])
+                ) AS src(key, weight)
+            ) / NULLIF(tfidf_norm * :src_tfidf_norm, 0),
+            0
+        )
+    ELSE 0 END
+"""
+
+
+def _source_vectors(source: Song) -> tuple[list[float], list[float]]:
+    """源歌曲的 (review, lyrics) 向量，缺少歌词向量时以评语向量代替"""
+    src_review = source.review_vector.tolist()
+    src_lyrics = source.lyrics_vector.tolist() if source.lyrics_vector is not None else src_review
+    return src_review, src_lyrics
+
+
+def _source_tfidf_params(source: Song) -> dict:
+    """源歌曲权重最高的 20 个关键词及其权重、范数（_TFIDF_SIM_SQL 的参数）"""
+    return _tfidf_params(source.tfidf_vector)
+
+
+def _tfidf_params(tfidf: dict | None) -> dict:
+    items = []
+    if tfidf and isinstance(tfidf, dict):
+        items = sorted(tfidf.items(), key=lambda kv: kv[1], reverse=True)[:20]
+    return {
+        "src_tfidf_keys": [k for k, _ in items],
+        "src_tfidf_weights": [float(w) for _, w in items],
+        "src_tfidf_norm": float(np.sqrt(sum(float(w) ** 2 for _, w in items))),
+    }
+
+
+@dataclass
+class _SubScores:
+    """
+    一首源歌曲的宽候选集及三路原始分（与权重无关）
+
+    拖动权重滑块时只需一次 (n, 3) @ (3,) 的矩阵乘重排，不再访问数据库；
+    去重按 songs.base_title 预先编码的分组在整个候选集上进行，不会因同曲多版本凑不满一页
+    """
+    items: list[SongSearchResult]   # 展示字段，score 在重排时填入
+    scores: np.ndarray              # (n, 3) float32：review_sim, lyrics_sim, tfidf_sim
+    titles: list[str]               # 各候选的 base_title
+    pool: int                       # 每路信号的候选深度
+
+    def __post_init__(self):
+        self._group_of: dict[str, int] = {}
+        self._groups = np.array(
+            [self._group_of.setdefault(t, len(self._group_of)) for t in self.titles], dtype=np.int64
+        )
+
+    def rank(
+        self, weights: tuple[float, float, float], limit: int,
+        exclude_titles: set[str] | None = None,
+    ) -> list[SongSearchResult]:
+        """
+        按给定权重取融合分 Top-limit，并附带三路子分数
+
+        exclude_titles 不为 None 时按主标题去重：每组只保留融合分最高的一首，
+        主标题在 exclude_titles 中的整组去掉
+        """
+        fused = self.scores @ np.asarray(weights, dtype=np.float32)
+        if exclude_titles is None:
+            top = VectorIndex.top_indices(fused, limit)
+        else:
+            order = np.argsort(-fused, kind="stable")
+            _, first = np.unique(self._groups[order], return_index=True)
+            order = order[np.sort(first)]
+            excluded = [self._group_of[t] for t in exclude_titles if t in self._group_of]
+            if excluded:
+                order = order[~np.isin(self._groups[order], excluded)]
+            top = order[:limit]
+        return [
+            self.items[i].model_copy(update={
+                "score": round(float(fused[i]), 4),
+                "review_score": round(float(self.scores[i, 0]), 4),
+                "lyrics_score": round(float(self.scores[i, 1]), 4),
+                "rational_score": round(float(self.scores[i, 2]), 4),
+            })
+            for i in top
+        ]
+
+
+def _display_item(row) -> SongSearchResult:
+    return SongSearchResult(
+        id=row.id,
+        title=row.title,
+        artist=row.artist,
+        album_cover=row.album_cover,
+        review_text=row.review_text,
+        vibe_tags=row.vibe_tags,
+        core_lyrics=row.core_lyrics,
+    )
+
+
+async def _fetch_subscores_sql(source: Song, pool: int) -> _SubScores:
+    """
+    pgvector 后端：review / lyrics（HNSW）与 TF-IDF（tfidf_keywords GIN）三路各自按索引取 Top-pool，
+    在各自独立的连接上并发执行，再只对候选并集计算三路原始分
+    """
+    src_review_vec, src_lyrics_vec = _source_vectors(source)
+    tfidf_params = _source_tfidf_params(source)
+
+    review_ids, lyrics_ids, tfidf_ids = await asyncio.gather(
+        vector_rank_ids("review_vector", src_review_vec, pool, exclude_id=source.id),
+        vector_rank_ids("lyrics_vector", src_lyrics_vec, pool, exclude_id=source.id),
+        _tfidf_rank_ids(source, tfidf_params, pool),
+    )
+    candidate_ids = list(dict.fromkeys([*review_ids, *lyrics_ids, *tfidf_ids]))
+    if not candidate_ids:
+        return _SubScores(items=[], scores=np.zeros((0, 3), dtype=np.float32), titles=[], pool=pool)
+
+    subscore_sql = sql_text(f"""
+        SELECT
+            id, title, artist, album_cover,
+            vibe_tags, review_text, core_lyrics, base_title,
+            (1 - (review_vector <=> CAST(:src_review_vec AS vector))) AS review_sim,
+            COALESCE(1 - (lyrics_vector <=> CAST(:src_lyrics_vec AS vector)), 0) AS lyrics_sim,
+            {_TFIDF_SIM_SQL} AS tfidf_sim
+        FROM songs
+        WHERE id = ANY(CAST(:ids AS text[]))
+          AND review_vector IS NOT NULL
+    """)
+    async with session_scope() as db:
+        db_result = await db.execute(subscore_sql, {
+            "ids": candidate_ids,
+            "src_review_vec": str(src_review_vec),
+            "src_lyrics_vec": str(src_lyrics_vec),
+            **tfidf_params,
+        })
+        rows = db_result.fetchall()
+
+    scores = np.array(
+        [(row.review_sim, row.lyrics_sim, row.tfidf_sim) for row in rows], dtype=np.float32
+    ).reshape(-1, 3)
+    return _SubScores(
+        items=[_display_item(row) for row in rows],
+        scores=scores,
+        titles=[row.base_title for row in rows],
+        pool=pool,
+    )
+
+
+async def _fetch_subscores_in_memory(index: VectorIndex, source: Song, pool: int) -> _SubScores:
+    """
+    内存向量后端：一次矩阵乘算出全库双向量相似度，取 review / lyrics / 默认融合分各自的 Top-pool，
+    再并上 TF-IDF 一路的 Top-pool（走 GIN 索引），最后用 SQL 只对候选补 TF-IDF 分与展示字段
+    """
+    src_review_vec, src_lyrics_vec = _source_vectors(source)
+    tfidf_params = _source_tfidf_params(source)
+    w_review, w_lyrics, _ = _PRECOMPUTED_WEIGHTS
+
+    def _candidate_rows():
+        review_sim, lyrics_sim = index.similarities(src_review_vec, src_lyrics_vec)
+        active = index.active.copy()
+        src_row = index.row_of(source.id)
+        if src_row is not None:
+            active[src_row] = False
+        rows = set()
+        for sim in (
+            np.where(active, review_sim, -np.inf),
+            # 无歌词向量的行存的是全 0，不参与 lyrics 一路
+            np.where(active & (lyrics_sim != 0), lyrics_sim, -np.inf),
+            np.where(active, review_sim * w_review + lyrics_sim * w_lyrics, -np.inf),
+        ):
+            rows.update(index.top_indices(sim, pool).tolist())
+        return review_sim, lyrics_sim, rows
+
+    (review_sim, lyrics_sim, rows), tfidf_ids = await asyncio.gather(
+        asyncio.to_thread(_candidate_rows),
+        _tfidf_rank_ids(source, tfidf_params, pool),
+    )
+    # TF-IDF 一路中不在内存索引里的歌曲（索引刷新前新入库）没有向量分，跳过
+    rows.update(r for r in map(index.row_of, tfidf_ids) if r is not None)
+
+    fetch_sql = sql_text(f"""
+        SELECT
+            id, title, artist, album_cover,
+            vibe_tags, review_text, core_lyrics, base_title,
+            {_TFIDF_SIM_SQL} AS tfidf_sim
+        FROM songs
+        WHERE id = ANY(CAST(:ids AS text[]))
+    """)
+    async with session_scope() as db:
+        db_result = await db.execute(fetch_sql, {
+            "ids": [index.ids[i] for i in rows],
+            **tfidf_params,
+        })
+        db_rows = db_result.fetchall()
+
+    scores = np.array(
+        [
+            (review_sim[i], lyrics_sim[i], row.tfidf_sim)
+            for row in db_rows
+            for i in (index.row_of(row.id),)
+        ],
+        dtype=np.float32,
+    ).reshape(-1, 3)
+    return _SubScores(
+        items=[_display_item(row) for row in db_rows],
+        scores=scores,
+        titles=[row.base_title for row in db_rows],
+        pool=pool,
+    )
+
+
+async def _load_subscores(source: Song, pool: int) -> _SubScores:
+    index = get_vector_index()
+    t0 = time.perf_counter()
+    if index is not None:
+        subscores = await _fetch_subscores_in_memory(index, source, pool)
+    else:
+        subscores = await _fetch_subscores_sql(source, pool)
+    _subscore_stats.upstream_seconds += time.perf_counter() - t0
+    _subscore_cache[(current_generation(), source.id)] = subscores
+    return subscores
+
+
+async def _get_subscores(source: Song, limit: int) -> _SubScores:
+    """源歌曲的三路原始分（缓存与权重无关，同一首歌的并发请求只查询一次）"""
+    pool = max(limit, settings.RECOMMEND_CANDIDATE_POOL)
+    cached = _subscore_cache.get((current_generation(), source.id))
+    if cached is not None and cached.pool >= pool:
+        _subscore_stats.hits += 1
+        return cached
+    _subscore_stats.misses += 1
+    return await _subscore_flight.do((source.id, pool), lambda: _load_subscores(source, pool))
+
+
+async def _fetch_candidates_precomputed(
+    source: Song, limit: int, exclude_titles: set[str] | None = None,
+) -> list[SongSearchResult] | None:
+    """
+    读取离线预计算的 song_neighbors（默认权重），按 rank 取前 limit 条
+
+    exclude_titles 不为 None 时按 base_title DISTINCT ON 去重，并去掉这些主标题；
+    表不存在、或该歌曲的邻居数不足 limit（新歌尚未计算 / 邻居后来被标记为重复）时
+    返回 None，由调用方回退到实时计算
+    """
+    distinct = "DISTINCT ON (s.base_title)" if exclude_titles is not None else ""
+    order = "s.base_title, n.rank" if exclude_titles is not None else "n.rank"
+    src_review_vec, src_lyrics_vec = _source_vectors(source)
+    # 三路子分数只对至多 K 条邻居计算，与实时路径 (_SubScores.rank) 返回的字段一致
+    neighbors_sql = sql_text(f"""
+        SELECT
+            id, title, artist, album_cover, vibe_tags, review_text, core_lyrics,
+            score, review_sim, lyrics_sim, tfidf_sim
+        FROM (
+            SELECT {distinct}
+                s.id, s.title, s.artist, s.album_cover,
+                s.vibe_tags, s.review_text, s.core_lyrics,
+                n.rank, n.score,
+                (1 - (s.review_vector <=> CAST(:src_review_vec AS vector))) AS review_sim,
+                COALESCE(1 - (s.lyrics_vector <=> CAST(:src_lyrics_vec AS vector)), 0) AS lyrics_sim,
+                {_TFIDF_SIM_SQL} AS tfidf_sim
+            FROM song_neighbors n
+            JOIN songs s ON s.id = n.neighbor_id
+            WHERE n.song_id = :src_id
+              AND s.is_duplicate = false
+              AND s.base_title != ALL(CAST(:exclude_titles AS text[]))
+            ORDER BY {order}
+        ) neighbors
+        ORDER BY rank
+        LIMIT :limit
+    """)
+    try:
+        async with session_scope() as db:
+            db_result = await db.execute(neighbors_sql, {
+                "src_id": source.id,
+                "src_review_vec": str(src_review_vec),
+                "src_lyrics_vec": str(src_lyrics_vec),
+                **_source_tfidf_params(source),
+                "exclude_titles": list(exclude_titles or ()),
+                "limit": limit,
+            })
+            rows = db_result.fetchall()
+    except ProgrammingError as e:
+        logger.warning(f"song_neighbors unavailable, falling back to live scoring: {e}")
+        return None
+    if len(rows) < limit:
+        return None
+
+    return [
+        SongSearchResult(
+            id=row.id,
+            title=row.title,
+            artist=row.artist,
+            album_cover=row.album_cover,
+            review_text=row.review_text,
+            vibe_tags=row.vibe_tags,
+            core_lyrics=row.core_lyrics,
+            score=round(float(row.score), 4),
+            review_score=round(float(row.review_sim), 4),
+            lyrics_score=round(float(row.lyrics_sim), 4),
+            rational_score=round(float(row.tfidf_sim), 4),
+        )
+        for row in rows
+    ]
+
+
+async def _tfidf_rank_ids(source: Song, tfidf_params: dict, pool: int) -> list[str]:
+    """RRF 的 TF-IDF 一路：与源歌曲关键词有交集的歌曲（&& 走 tfidf_keywords GIN 索引），按加权余弦排名"""
+    if not tfidf_params["src_tfidf_keys"]:
+        return []
+    async with session_scope() as db:
+        result = await db.execute(
+            sql_text(f"""
+                SELECT id
+                FROM songs
+                WHERE tfidf_keywords && CAST(:src_tfidf_keys AS text[])
+                  AND id != :src_id
+                  AND review_vector IS NOT NULL
+                  AND is_duplicate = false
+                ORDER BY {_TFIDF_SIM_SQL} DESC
+                LIMIT :pool
+            """),
+            {"src_id": source.id, "pool": pool, **tfidf_params},
+        )
+        return [row.id for row in result.fetchall()]
+
 
+async def _fetch_candidates_rrf(
+    source: Song, limit: int,
+    w_review: float, w_lyrics: float, w_tfidf: float,
+    exclude_titles: set[str] | None = None,
+) -> list[SongSearchResult]:
+    """
+    fusion=rrf：review / lyrics / TF-IDF 三路独立取 Top-N（各自独立连接并发），按名次融合
+
+    权重作为各路的 RRF 权重；score 为归一化到 0~1 的 RRF 分
+    exclude_titles 不为 None 时在完整融合列表上按 base_title 去重（SQL DISTINCT ON）后再截取
+    """
+    src_review_vec, src_lyrics_vec = _source_vectors(source)
+    pool = max(limit, settings.RECOMMEND_CANDIDATE_POOL)
+    k = settings.SEARCH_RRF_K
 
-def _base_title(title: str) -> str:
-    """提取主标题用于模糊去重"""
-    t = _BRACKET_RE.sub('', title)   # 安和桥（DJ版）  -> 安和桥
-    t = _VERSION_RE.sub('', t)       # 安和桥 Live     -> 安和桥
-    t = _SPACE_RE.sub('', t)         # 老男孩 筷子兄弟  -> 老男孩
-    return t.strip()
+    index = get_vector_index()
+    if index is not None:
+        vector_ranks = memory_rank_ids(index, src_review_vec, src_lyrics_vec, pool, exclude_id=source.id)
+    else:
+        vector_ranks = asyncio.gather(
+            vector_rank_ids("review_vector", src_review_vec, pool, exclude_id=source.id),
+            vector_rank_ids("lyrics_vector", src_lyrics_vec, pool, exclude_id=source.id),
+        )
+    (review_ids, lyrics_ids), tfidf_ids = await asyncio.gather(
+        vector_ranks,
+        _tfidf_rank_ids(source, _source_tfidf_params(source), pool) if w_tfidf > 0 else no_ranks(),
+    )
+    fused = rrf_merge([
+        (review_ids, w_review),
+        (lyrics_ids, w_lyrics),
+        (tfidf_ids, w_tfidf),
+    ], k)
+    if exclude_titles is not None:
+        fused_scores = dict(fused)
+        kept = await distinct_base_titles([song_id for song_id, _ in fused], exclude_titles)
+        fused = [(song_id, fused_scores[song_id]) for song_id in kept]
+    fused = fused[:limit]
+    if not fused:
+        return []
+    max_score = rrf_max_score([w_review, w_lyrics, w_tfidf], k)
+
+    async with session_scope() as db:
+        result = await db.execute(
+            sql_text("""
+                SELECT id, title, artist, album_cover, vibe_tags, review_text, core_lyrics
+                FROM songs
+                WHERE id = ANY(CAST(:ids AS text[]))
+            """),
+            {"ids": [song_id for song_id, _ in fused]},
+        )
+        rows = {row.id: row for row in result.fetchall()}
+
+    return [
+        SongSearchResult(
+            id=row.id,
+            title=row.title,
+            artist=row.artist,
+            album_cover=row.album_cover,
+            review_text=row.review_text,
+            vibe_tags=row.vibe_tags,
+            core_lyrics=row.core_lyrics,
+            score=round(score / max_score, 4),
+        )
+        for song_id, score in fused
+        if (row := rows.get(song_id)) is not None
+    ]
+
+
+async def _weighted_candidates(
+    source: Song, limit: int, weights: tuple[float, float, float],
+    exclude_titles: set[str] | None = None,
+) -> list[SongSearchResult]:
+    """fusion=weighted 的推荐列表（按融合分降序）"""
+    if (
+        settings.RECOMMEND_USE_NEIGHBORS
+        and weights == _PRECOMPUTED_WEIGHTS
+        and (current_generation(), source.id) not in _subscore_cache
+    ):
+        cache_key = (current_generation(), source.id, limit, "neighbors", exclude_titles is not None)
+        if cache_key not in _recommend_cache:
+            candidates = await _fetch_candidates_precomputed(source, limit, exclude_titles)
+            if candidates is not None:
+                _recommend_cache[cache_key] = candidates
+        if cache_key in _recommend_cache:
+            return _recommend_cache[cache_key]
+
+    subscores = await _get_subscores(source, limit)
+    return subscores.rank(weights, limit, exclude_titles)
 
 
 async def get_similar_songs(
-    source: Song, top_k: int, db: AsyncSession,
+    source: Song, top_k: int,
     w_review: float = 0.5, w_lyrics: float = 0.4, w_tfidf: float = 0.1,
-    dedupe: bool = False,
+    dedupe: bool = False, fusion: str = "weighted",
+    diversity: float | None = None, artist_cap: int | None = None,
 ) -> list[SongSearchResult]:
     """
     给定一首歌，返回最相似的 Top-K 推荐
 
-    双向量余弦相似 + TF-IDF 关键词重叠（参数化 SQL），权重可动态调整
-    dedupe=True 时按主标题模糊去重，每个歌名只保留相似度最高的一条
+    双向量余弦相似 + TF-IDF 加权余弦，权重可动态调整：
+    每首源歌曲只查询一次三路原始分（_SubScores），任意权重都在内存中重排；
+    默认权重且尚未缓存时优先读取离线预计算的 song_neighbors 表
+    dedupe=True 时按 songs.base_title 去重，每个主标题只保留相似度最高的一条（在完整候选集上
+    去重，不再多取候选后逐条跑正则，结果数不会因同曲多版本而不足）
+    fusion=rrf 时三路独立检索后按名次融合（_fetch_candidates_rrf）
+    diversity / artist_cap 时在 RECOMMEND_CANDIDATE_POOL 条候选上做 MMR 重排（见 diversity.py）
     """
     if source.review_vector is None:
         return []
 
-    # cache key 不含 dedupe：始终缓存足量原始候选列表，去重在返回前做 Python 过滤
-    cache_key = (source.id, top_k, w_review, w_lyrics, w_tfidf)
-    if cache_key not in _recommend_cache:
-        src_review_vec = str(source.review_vector.tolist())
-        src_lyrics_vec = (
-            str(source.lyrics_vector.tolist())
-            if source.lyrics_vector is not None
-            else src_review_vec
-        )
+    weights = (w_review, w_lyrics, w_tfidf)
+    # 源歌曲自身的主标题也要排除，避免推荐同名的其他版本
+    exclude_titles = {base_title(source.title)} if dedupe else None
+    # MMR 需要比 top_k 宽得多的候选池才有可选的余地
+    diversify_on = bool(diversity) or bool(artist_cap)
+    fetch_limit = max(top_k, settings.RECOMMEND_CANDIDATE_POOL) if diversify_on else top_k
 
-        src_tfidf_keys: list[str] = []
-        if source.tfidf_vector and isinstance(source.tfidf_vector, dict):
-            src_tfidf_keys = list(source.tfidf_vector.keys())[:20]
-
-        # 始终多取 5 倍候选，保证去重后仍有足够结果
-        fetch_limit = top_k * 5
-
-        recommend_sql = sql_text("""
-            WITH candidates AS (
-                SELECT
-                    id, title, artist, album_cover,
-                    vibe_tags, review_text, core_lyrics,
-                    (1 - (review_vector <=> CAST(:src_review_vec AS vector))) AS review_sim,
-                    COALESCE(1 - (lyrics_vector <=> CAST(:src_lyrics_vec AS vector)), 0) AS lyrics_sim,
-                    COALESCE(
-                        (
-                            SELECT COUNT(*)::float
-                            FROM jsonb_object_keys(COALESCE(tfidf_vector, '{}'::jsonb)) AS k(key)
-                            WHERE k.key = ANY(CAST(:src_tfidf_keys AS text[]))
-                        ) / NULLIF(:src_tfidf_len, 0),
-                        0
-                    ) AS tfidf_overlap
-                FROM songs
-                WHERE id != :src_id
-                  AND review_vector IS NOT NULL
-                  AND is_duplicate = false
+    if fusion == "rrf":
+        cache_key = (current_generation(), source.id, fetch_limit, *weights, fusion, dedupe)
+        if cache_key not in _recommend_cache:
+            _recommend_cache[cache_key] = await _fetch_candidates_rrf(
+                source, fetch_limit, *weights, exclude_titles
             )
+        candidates = _recommend_cache[cache_key]
+    else:
+        candidates = await _weighted_candidates(source, fetch_limit, weights, exclude_titles)
+
+    if diversify_on:
+        return await diversify(candidates, top_k, diversity, artist_cap)
+    return candidates[:top_k]
+
+
+def get_recommend_cache_stats() -> dict:
+    """推荐三路原始分缓存的命中统计"""
+    return {
+        **_subscore_stats.snapshot(),
+        "size": len(_subscore_cache),
+        "maxsize": _subscore_cache.maxsize,
+        "ranked_lists": len(_recommend_cache),
+    }
+
+
+# ──────────────────────────── 多种子推荐 ────────────────────────────
+
+def _seed_centroid(seeds: list[Song]) -> tuple[list[float], list[float], dict]:
+    """
+    种子歌曲的质心查询：review / lyrics 向量各自 L2 归一化后求和（余弦下与均值等价），
+    TF-IDF 关键词权重按归一化后相加
+    """
+    review = np.zeros(len(seeds[0].review_vector), dtype=np.float32)
+    lyrics = np.zeros_like(review)
+    tfidf: dict[str, float] = {}
+    for seed in seeds:
+        src_review, src_lyrics = _source_vectors(seed)
+        for acc, vec in ((review, src_review), (lyrics, src_lyrics)):
+            vec = np.asarray(vec, dtype=np.float32)
+            norm = np.linalg.norm(vec)
+            if norm > 0:
+                acc += vec / norm
+        params = _source_tfidf_params(seed)
+        # 权重全为 0（或没有关键词）的种子不参与 TF-IDF 质心
+        if params["src_tfidf_norm"] <= 0:
+            continue
+        for key, weight in zip(params["src_tfidf_keys"], params["src_tfidf_weights"]):
+            tfidf[key] = tfidf.get(key, 0.0) + weight / params["src_tfidf_norm"]
+    return review.tolist(), lyrics.tolist(), tfidf
+
+
+async def _fetch_seed_subscores(seeds: list[Song], pool: int) -> _SubScores:
+    """
+    以种子质心为查询做一次索引检索（内存矩阵乘或 HNSW），候选补齐三路原始分
+
+    pgvector 后端按质心 review 向量走 HNSW 取 Top-pool，再只对这些行计算 lyrics / TF-IDF 分
+    """
+    review_vec, lyrics_vec, tfidf = _seed_centroid(seeds)
+    tfidf_params = _tfidf_params(tfidf)
+    seed_ids = [seed.id for seed in seeds]
+    w_review, w_lyrics, _ = _PRECOMPUTED_WEIGHTS
+
+    index = get_vector_index()
+    review_sim = lyrics_sim = None
+    if index is not None:
+        def _candidate_rows():
+            r_sim, l_sim = index.similarities(review_vec, lyrics_vec)
+            active = index.active.copy()
+            for row in map(index.row_of, seed_ids):
+                if row is not None:
+                    active[row] = False
+            fused = np.where(active, r_sim * w_review + l_sim * w_lyrics, -np.inf)
+            return r_sim, l_sim, index.top_indices(fused, pool)
+
+        review_sim, lyrics_sim, top = await asyncio.to_thread(_candidate_rows)
+        fetch_sql = sql_text(f"""
             SELECT
                 id, title, artist, album_cover,
-                vibe_tags, review_text, core_lyrics,
-                review_sim, lyrics_sim, tfidf_overlap
-            FROM candidates
-            ORDER BY
-                review_sim * :w_review
-                + lyrics_sim * :w_lyrics
-                + tfidf_overlap * :w_tfidf
-                DESC
-            LIMIT :limit
+                vibe_tags, review_text, core_lyrics, base_title,
+                {_TFIDF_SIM_SQL} AS tfidf_sim
+            FROM songs
+            WHERE id = ANY(CAST(:ids AS text[]))
+        """)
+        params = {"ids": [index.ids[i] for i in top], **tfidf_params}
+    else:
+        fetch_sql = sql_text(f"""
+            SELECT
+                id, title, artist, album_cover,
+                vibe_tags, review_text, core_lyrics, base_title,
+                (1 - (review_vector <=> CAST(:review_vec AS vector))) AS review_sim,
+                COALESCE(1 - (lyrics_vector <=> CAST(:lyrics_vec AS vector)), 0) AS lyrics_sim,
+                {_TFIDF_SIM_SQL} AS tfidf_sim
+            FROM songs
+            WHERE id IN (
+                SELECT id
+                FROM songs
+                WHERE review_vector IS NOT NULL
+                  AND is_duplicate = false
+                  AND id != ALL(CAST(:seed_ids AS text[]))
+                ORDER BY review_vector <=> CAST(:review_vec AS vector)
+                LIMIT :pool
+            )
         """)
+        params = {
+            "seed_ids": seed_ids,
+            "review_vec": str(review_vec),
+            "lyrics_vec": str(lyrics_vec),
+            "pool": pool,
+            **tfidf_params,
+        }
 
-        db_result = await db.execute(recommend_sql, {
-            "src_id": source.id,
-            "src_review_vec": src_review_vec,
-            "src_lyrics_vec": src_lyrics_vec,
-            "src_tfidf_keys": src_tfidf_keys,
-            "src_tfidf_len": len(src_tfidf_keys),
-            "limit": fetch_limit,
-            "w_review": w_review,
-            "w_lyrics": w_lyrics,
-            "w_tfidf": w_tfidf,
-        })
+    async with session_scope() as db:
+        if index is None:
+            # HNSW 单次扫描最多返回 ef_search 条（仅当前事务生效）
+            await db.execute(
+                sql_text("SELECT set_config('hnsw.ef_search', :ef, true)"),
+                {"ef": str(max(pool, 40))},
+            )
+        db_result = await db.execute(fetch_sql, params)
         rows = db_result.fetchall()
 
-        _recommend_cache[cache_key] = [
-            SongSearchResult(
-                id=row.id,
-                title=row.title,
-                artist=row.artist,
-                album_cover=row.album_cover,
-                review_text=row.review_text,
-                vibe_tags=row.vibe_tags,
-                core_lyrics=row.core_lyrics,
-                score=round(
-                    float(row.review_sim) * w_review
-                    + float(row.lyrics_sim) * w_lyrics
-                    + float(row.tfidf_overlap) * w_tfidf,
-                    4,
-                ),
-            )
+    if index is not None:
+        scores = [
+            (review_sim[i], lyrics_sim[i], row.tfidf_sim)
             for row in rows
+            for i in (index.row_of(row.id),)
         ]
+    else:
+        scores = [(row.review_sim, row.lyrics_sim, row.tfidf_sim) for row in rows]
+    return _SubScores(
+        items=[_display_item(row) for row in rows],
+        scores=np.array(scores, dtype=np.float32).reshape(-1, 3),
+        titles=[row.base_title for row in rows],
+        pool=pool,
+    )
 
-    all_candidates = _recommend_cache[cache_key]
-    if not dedupe:
-        return all_candidates[:top_k]
 
-    # 把源歌曲自身的主标题预先加入 seen，避免推荐同名歌曲
-    seen: set[str] = {_base_title(source.title)}
-    results = []
-    for item in all_candidates:
-        base = _base_title(item.title)
-        if base in seen:
-            continue
-        seen.add(base)
-        results.append(item)
-        if len(results) >= top_k:
-            break
-    return results
+async def get_batch_recommendations(
+    seeds: list[Song], top_k: int,
+    w_review: float = 0.5, w_lyrics: float = 0.4, w_tfidf: float = 0.1,
+    dedupe: bool = True,
+) -> list[SongSearchResult]:
+    """
+    多首种子歌曲（如当前播放队列）的续播推荐
+
+    以种子向量的质心做一次检索，返回排除种子、按主标题去重后的单一列表；
+    替代客户端逐首调用 /recommend/{song_id} 再自行合并（N 个种子 N 次扫描）
+    """
+    seeds = [seed for seed in seeds if seed.review_vector is not None]
+    if not seeds:
+        return []
+
+    cache_key = (current_generation(), "batch", tuple(sorted(seed.id for seed in seeds)))
+    subscores = _subscore_cache.get(cache_key)
+    if subscores is None or subscores.pool < top_k:
+        pool = max(top_k, settings.RECOMMEND_CANDIDATE_POOL)
+        subscores = await _fetch_seed_subscores(seeds, pool)
+        _subscore_cache[cache_key] = subscores
+
+    # 种子歌曲的主标题也要排除，避免推荐种子的其他版本
+    exclude_titles = {base_title(seed.title) for seed in seeds} if dedupe else None
+    return subscores.rank((w_review, w_lyrics, w_tfidf), top_k, exclude_titles)
@@ -0,0 +1,159 @@
+"""
+上游容错：请求级截止时间 + 熔断器
+
+截止时间 (deadline)：
+  perform_hybrid_search 入口用 deadline_scope() 设定本次请求的总预算，
+  经 contextvars 传递到 LLM / Embedding 调用（asyncio Task 创建时复制上下文），
+  with_deadline() 取 "剩余时间" 与 "单次上游超时" 的较小值作为 wait_for 超时。
+
+熔断器 (CircuitBreaker)：
+  closed    → 连续失败 failure_threshold 次后进入 open
+  open      → 直接拒绝，reset_seconds 后进入 half_open
+  half_open → 只放行一个探测请求，成功则 closed，失败重新 open
+"""
+import asyncio
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, TypeVar
+
+from app.config import get_settings
+
+settings = get_settings()
+
+T = TypeVar("T")
+
+
+class UpstreamUnavailable(Exception):
+    """上游（LLM / Embedding）不可用，调用方应降级"""
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    """熔断器打开，请求未发出"""
+
+
+class DeadlineExceeded(UpstreamUnavailable):
+    """请求截止时间已到，上游调用被放弃"""
+
+
+# ──────────────────────────── 截止时间 ────────────────────────────
+
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar("deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(seconds: float | None):
+    """在当前上下文设定截止时间；已有更早的截止时间时保持不变"""
+    if not seconds or seconds <= 0:
+        yield
+        return
+    new_deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(new_deadline if current is None else min(current, new_deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    """距截止时间的剩余秒数，未设定时返回 None"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+async def with_deadline(aw: Awaitable[T], timeout: float | None = None) -> T:
+    """按 min(剩余时间, timeout) 等待 aw，超时抛出 DeadlineExceeded"""
+    left = remaining()
+    if left is not None:
+        timeout = left if timeout is None else min(timeout, left)
+    if timeout is not None and timeout <= 0:
+        if asyncio.iscoroutine(aw):
+            aw.close()
+        raise DeadlineExceeded("deadline already exceeded")
+    try:
+        return await asyncio.wait_for(aw, timeout)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"timed out after {timeout:.2f}s")
+
+
+# ──────────────────────────── 熔断器 ────────────────────────────
+
+_registry: list["CircuitBreaker"] = []
+
+
+class CircuitBreaker:
+    """连续失败计数熔断器，open 状态下定时放行单个探测请求"""
+
+    def __init__(
+        self, name: str,
+        failure_threshold: int | None = None,
+        reset_seconds: float | None = None,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold or settings.BREAKER_FAILURE_THRESHOLD
+        self.reset_seconds = reset_seconds or settings.BREAKER_RESET_SECONDS
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._probing = False
+        _registry.append(self)
+
+    @property
+    def is_open(self) -> bool:
+        """打开且尚未到探测时间（调用方可据此直接降级，不占用探测名额）"""
+        return self.state == "open" and time.monotonic() - self.opened_at < self.reset_seconds
+
+    def allow(self) -> bool:
+        """是否放行本次请求；half_open 时只放行一个探测"""
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = "half_open"
+            self._probing = False
+        if self.state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """经熔断器执行 fn()：打开时抛出 CircuitOpenError，异常计为失败"""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit open")
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            # 调用方取消不代表上游故障，只归还探测名额
+            self._probing = False
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "state": "open" if self.is_open else self.state,
+            "failures": self.failures,
+            "rejected": self.rejected,
+        }
+
+
+def get_breaker_stats() -> dict:
+    """各熔断器的当前状态"""
+    return {breaker.name: breaker.stats() for breaker in _registry}
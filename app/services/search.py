@@ -10,15 +10,33 @@
   3. rational_score — TF-IDF 关键词 + 精确匹配
 """
 import asyncio
-import jieba
+import hashlib
+import logging
+import secrets
+import time
+from typing import AsyncIterator
+
+import numpy as np
+from cachetools import TTLCache
 from sqlalchemy import text as sql_text
-from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.database import session_scope
 from app.schemas import SearchResponse, SongSearchResult
-from app.services.embedding import get_embedding
+from app.services.data_version import current_generation
+from app.services.dedupe import distinct_base_titles
+from app.services.diversity import diversify
+from app.services.embedding import embedding_available, get_embedding
+from app.services.fusion import memory_rank_ids, no_ranks, rrf_max_score, rrf_merge, vector_rank_ids
+from app.services.intent_matcher import match_exact_intent
 from app.services.llm import parse_search_intent
+from app.services.query_cache import CacheStats, normalize_query
+from app.services.resilience import UpstreamUnavailable, deadline_scope
+from app.services.singleflight import SingleFlight
+from app.services.tokenizer import tokenize
+from app.services.vector_index import VectorIndex, get_vector_index
 from app.config import get_settings
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
 
 # 停用词 (搜索时过滤)
@@ -29,13 +47,27 @@ ULTRA_STOP_WORDS = {
 }
 
 
-def _clean_query_words(query: str) -> list[str]:
-    """分词并过滤停用词"""
-    words = jieba.lcut(query)
+async def _clean_query_words(query: str) -> list[str]:
+    """分词并过滤停用词（分词在线程池中执行）"""
+    words = await tokenize(query)
     cleaned = [w for w in words if w not in ULTRA_STOP_WORDS and len(w.strip()) > 1]
     return cleaned if cleaned else words
 
 
+# 搜索响应缓存：相同 (查询, mode) 直接返回上次的完整排序列表
+_search_cache: TTLCache = TTLCache(maxsize=settings.SEARCH_CACHE_SIZE, ttl=settings.SEARCH_CACHE_TTL)
+# 翻页游标：result_set_id -> 完整排序列表，后续页直接切片，不再调用上游或执行向量 SQL
+_result_sets: TTLCache = TTLCache(maxsize=settings.SEARCH_CURSOR_SIZE, ttl=settings.SEARCH_CURSOR_TTL)
+_search_stats = CacheStats()
+# 缓存未命中时，相同 key 的并发搜索只执行一次完整流程
+_search_flight = SingleFlight("search")
+
+# auto 模式投机执行统计：投机结果被采用 / 被丢弃 / LLM 超出预算
+_speculation_stats = {"used": 0, "discarded": 0, "intent_timeouts": 0}
+# 超出预算后仍在后台完成的意图解析任务（保持强引用，结果写入意图缓存）
+_background_tasks: set[asyncio.Task] = set()
+
+
 # 权重配置（从 config 读取，支持环境变量覆盖）
 WEIGHT_MAP = {
     "lyrics": settings.SEARCH_WEIGHT_LYRICS,
@@ -45,66 +77,650 @@ WEIGHT_MAP = {
 
 
 async def _exact_search(
-    intent: dict, top_k: int, db: AsyncSession
+    intent: dict, top_k: int
 ) -> list[SongSearchResult]:
-    """exact 类型：直接走精确 SQL，不做向量计算"""
-    exact_sql = sql_text("""
+    """
+    exact 类型：直接走精确 SQL，不做向量计算
+
+    ILIKE 子串匹配与 pg_trgm 相似度 (%) 双路召回，均可走 title / artist 的
+    trigram GIN 索引；子串命中记满分，未命中按相似度折算，带错别字的查询也能匹配。
+    """
+    artist, title = intent.get("artist"), intent.get("title")
+    if not artist and not title:
+        return []
+
+    conditions = []
+    if artist:
+        conditions.append("(artist ILIKE :artist_q OR artist % :artist)")
+    if title:
+        conditions.append("(title ILIKE :title_q OR title % :title)")
+
+    exact_sql = sql_text(f"""
+        WITH matched AS (
+            SELECT
+                id, title, artist, album_cover,
+                vibe_tags, review_text, core_lyrics,
+                CASE WHEN :has_artist THEN similarity(artist, :artist) ELSE 0 END AS artist_sim,
+                CASE WHEN :has_title  THEN similarity(title,  :title)  ELSE 0 END AS title_sim,
+                (:has_artist AND artist ILIKE :artist_q) AS artist_hit,
+                (:has_title  AND title  ILIKE :title_q)  AS title_hit
+            FROM songs
+            WHERE is_duplicate = false
+              AND ({" OR ".join(conditions)})
+        )
+        SELECT *,
+            (
+                CASE WHEN artist_hit THEN 2.0 ELSE 2.0 * artist_sim END +
+                CASE WHEN title_hit  THEN 3.0 ELSE 3.0 * title_sim  END
+            ) AS score
+        FROM matched
+        ORDER BY score DESC, artist_sim + title_sim DESC
+        LIMIT :limit
+    """)
+    async with session_scope() as db:
+        await db.execute(
+            sql_text("SELECT set_config('pg_trgm.similarity_threshold', :t, true)"),
+            {"t": str(settings.SEARCH_TRGM_THRESHOLD)},
+        )
+        result = await db.execute(exact_sql, {
+            "artist":     artist or "",
+            "title":      title or "",
+            "artist_q":   f"%{artist}%" if artist else "",
+            "title_q":    f"%{title}%" if title else "",
+            "has_artist": bool(artist),
+            "has_title":  bool(title),
+            "limit":      top_k,
+        })
+        rows = result.fetchall()
+    return [
+        SongSearchResult(
+            id=row.id, title=row.title, artist=row.artist,
+            album_cover=row.album_cover, review_text=row.review_text,
+            vibe_tags=row.vibe_tags, core_lyrics=row.core_lyrics,
+            score=round(float(row.score) / 5.0, 4),  # 归一化到 0~1（最高分 artist+title = 5.0）
+        )
+        for row in rows
+    ]
+
+
+async def _lexical_search(
+    user_query: str, top_k: int
+) -> list[SongSearchResult]:
+    """
+    降级检索：不依赖 LLM / Embedding 的纯关键词匹配
+
+    search_tsv (歌名 + 歌手 + 分词歌词) 全文匹配与 title / artist 的 pg_trgm 相似度双路召回，
+    分数取 ts_rank_cd (归一化到 0~1) 与 trigram 相似度的较大者。
+    """
+    lexical_sql = sql_text("""
         SELECT
             id, title, artist, album_cover,
             vibe_tags, review_text, core_lyrics,
-            (
-                CASE WHEN artist ILIKE :artist_q THEN 2.0 ELSE 0 END +
-                CASE WHEN title  ILIKE :title_q  THEN 3.0 ELSE 0 END
+            GREATEST(
+                ts_rank_cd(search_tsv, to_tsquery('simple', :ts_q), 32),
+                similarity(title, :q),
+                similarity(artist, :q)
             ) AS score
         FROM songs
         WHERE is_duplicate = false
           AND (
-              (:has_artist AND artist ILIKE :artist_q) OR
-              (:has_title  AND title  ILIKE :title_q)
+              search_tsv @@ to_tsquery('simple', :ts_q)
+              OR title % :q
+              OR artist % :q
           )
         ORDER BY score DESC
         LIMIT :limit
     """)
-    artist_q = f"%{intent['artist']}%" if intent.get("artist") else "%%"
-    title_q  = f"%{intent['title']}%"  if intent.get("title")  else "%%"
-    result = await db.execute(exact_sql, {
-        "artist_q":   artist_q,
-        "title_q":    title_q,
-        "has_artist": bool(intent.get("artist")),
-        "has_title":  bool(intent.get("title")),
-        "limit":      top_k,
-    })
-    rows = result.fetchall()
+    lexical_params = await _lexical_params(user_query, {})
+    async with session_scope() as db:
+        await db.execute(
+            sql_text("SELECT set_config('pg_trgm.similarity_threshold', :t, true)"),
+            {"t": str(settings.SEARCH_TRGM_THRESHOLD)},
+        )
+        result = await db.execute(lexical_sql, {
+            "ts_q":  lexical_params["ts_q"],
+            "q":     user_query.strip(),
+            "limit": top_k,
+        })
+        rows = result.fetchall()
     return [
         SongSearchResult(
             id=row.id, title=row.title, artist=row.artist,
             album_cover=row.album_cover, review_text=row.review_text,
             vibe_tags=row.vibe_tags, core_lyrics=row.core_lyrics,
-            score=round(float(row.score) / 5.0, 4),  # 归一化到 0~1（最高分 artist+title = 5.0）
+            score=round(float(row.score), 4),
+            rational_score=round(float(row.score), 4),
         )
         for row in rows
     ]
 
 
+async def _degraded_search(user_query: str, top_k: int) -> SearchResponse:
+    results = await _lexical_search(user_query, top_k)
+    return SearchResponse(query=user_query, intent_type="lexical", results=results, degraded=True)
+
+
+# rational 分：歌手 / 歌名命中 + 分词 ts_rank（s 为 songs 表别名）
+_RATIONAL_SCORE_SQL = """
+    CASE WHEN s.artist ILIKE :artist_q THEN 4.0 ELSE 0 END +
+    CASE WHEN s.title ILIKE :title_q THEN 3.0 ELSE 0 END +
+    ts_rank_cd(s.search_tsv, to_tsquery('simple', :ts_q))
+"""
+
+
+async def _lexical_params(user_query: str, intent: dict) -> dict:
+    """关键词相关的 SQL 参数：分词 tsquery + 意图中的歌手 / 歌名"""
+    cleaned_words = await _clean_query_words(user_query)
+    return {
+        "ts_q": " | ".join(cleaned_words),
+        "artist_q": f"%{intent['artist']}%" if intent.get("artist") else "%__NONE__%",
+        "title_q": f"%{intent['title']}%" if intent.get("title") else "%__NONE__%",
+    }
+
+
+def _lexical_candidates_sql(intent: dict) -> str:
+    """
+    关键词召回 SELECT：按 rational 分降序取前 :pool 个 id
+
+    条件只拼接实际存在的字段，保证每个 OR 分支都能走索引
+    (search_tsv → GIN，artist / title ILIKE → trigram GIN)
+    """
+    conditions = ["s.search_tsv @@ to_tsquery('simple', :ts_q)"]
+    if intent.get("artist"):
+        conditions.append("s.artist ILIKE :artist_q")
+    if intent.get("title"):
+        conditions.append("s.title ILIKE :title_q")
+    return f"""
+        SELECT s.id
+        FROM songs s
+        WHERE s.review_vector IS NOT NULL
+          AND s.is_duplicate = false
+          AND ({" OR ".join(conditions)})
+        ORDER BY {_RATIONAL_SCORE_SQL} DESC
+        LIMIT :pool
+    """
+
+
+def _lexical_candidates_cte(intent: dict) -> str:
+    """关键词召回 CTE (lexical_candidates)"""
+    return f"lexical_candidates AS ({_lexical_candidates_sql(intent)})"
+
+
+async def _lexical_rank_ids(lexical_params: dict, intent: dict, pool: int) -> list[str]:
+    """RRF 的关键词一路：search_tsv / 歌手 / 歌名命中，按 rational 分排名"""
+    async with session_scope() as db:
+        result = await db.execute(
+            sql_text(_lexical_candidates_sql(intent)), {**lexical_params, "pool": pool}
+        )
+        return [row.id for row in result.fetchall()]
+
+
+async def _hybrid_search(
+    user_query: str, query_vec: list[float], intent: dict,
+    weights: dict, top_k: int, fusion: str = "weighted",
+) -> list[SongSearchResult]:
+    """
+    两阶段混合检索
+
+    1. 召回：review / lyrics 各自 ORDER BY vector <=> q LIMIT N 走 HNSW 索引，
+       rational 权重 > 0 时再补一路关键词召回，三路候选取并集
+    2. 精排：仅对候选集计算三路融合分，阈值与权重与原全表公式一致
+
+    排序表达式只作用在候选集上，检索耗时不再随曲库规模线性增长。
+    VECTOR_BACKEND=memory 且内存索引已加载时改走 _hybrid_search_in_memory。
+    fusion=rrf 时改走 _hybrid_search_rrf（各路独立检索 + 名次融合）。
+    """
+    if fusion == "rrf":
+        return await _hybrid_search_rrf(user_query, query_vec, intent, weights, top_k)
+
+    index = get_vector_index()
+    if index is not None:
+        return await _hybrid_search_in_memory(index, user_query, query_vec, intent, weights, top_k)
+
+    pool = settings.SEARCH_CANDIDATE_POOL
+    use_lexical = weights["rational"] > 0
+
+    lexical_cte = _lexical_candidates_cte(intent) + "," if use_lexical else ""
+    lexical_union = "UNION SELECT id FROM lexical_candidates" if use_lexical else ""
+
+    # 混合 SQL (候选召回 + 双向量 + TF-IDF + 精确匹配)
+    search_sql = sql_text(f"""
+        WITH review_candidates AS (
+            SELECT id
+            FROM songs
+            WHERE review_vector IS NOT NULL
+              AND is_duplicate = false
+            ORDER BY review_vector <=> CAST(:q_vec AS vector)
+            LIMIT :pool
+        ),
+        lyrics_candidates AS (
+            SELECT id
+            FROM songs
+            WHERE lyrics_vector IS NOT NULL
+              AND is_duplicate = false
+            ORDER BY lyrics_vector <=> CAST(:q_vec AS vector)
+            LIMIT :pool
+        ),
+        {lexical_cte}
+        candidates AS (
+            SELECT id FROM review_candidates
+            UNION SELECT id FROM lyrics_candidates
+            {lexical_union}
+        ),
+        scoring_pool AS (
+            SELECT
+                s.id, s.title, s.artist, s.album_cover,
+                s.vibe_tags, s.review_text, s.core_lyrics,
+                (1 - (s.review_vector <=> CAST(:q_vec AS vector))) AS review_score,
+                COALESCE(1 - (s.lyrics_vector <=> CAST(:q_vec AS vector)), 0) AS lyrics_score,
+                ({_RATIONAL_SCORE_SQL}) AS rational_score
+            FROM songs s
+            JOIN candidates c ON c.id = s.id
+            WHERE s.review_vector IS NOT NULL
+        )
+        SELECT *,
+               (review_score * :w_rev
+                + lyrics_score * :w_lyr
+                + LEAST(rational_score, 4.0) / 4.0 * :w_rat
+               ) AS final_score
+        FROM scoring_pool
+        WHERE review_score > :threshold OR lyrics_score > :threshold
+        ORDER BY final_score DESC
+        LIMIT :limit
+    """)
+
+    lexical_params = await _lexical_params(user_query, intent)
+    async with session_scope() as db:
+        # HNSW 单次扫描最多返回 ef_search 条，候选池更大时需要同步放宽（仅当前事务生效）
+        await db.execute(
+            sql_text("SELECT set_config('hnsw.ef_search', :ef, true)"),
+            {"ef": str(max(pool, 40))},
+        )
+        result = await db.execute(search_sql, {
+            **lexical_params,
+            "q_vec": str(query_vec),
+            "w_rev": weights["review"],
+            "w_lyr": weights["lyrics"],
+            "w_rat": weights["rational"],
+            "threshold": settings.SEARCH_SCORE_THRESHOLD,
+            "pool": pool,
+            "limit": top_k,
+        })
+        rows = result.fetchall()
+
+    # 组装响应（含可解释性子分数）
+    return [
+        SongSearchResult(
+            id=row.id,
+            title=row.title,
+            artist=row.artist,
+            album_cover=row.album_cover,
+            review_text=row.review_text,
+            vibe_tags=row.vibe_tags,
+            core_lyrics=row.core_lyrics,
+            score=round(float(row.final_score), 4),
+            review_score=round(float(row.review_score), 4),
+            lyrics_score=round(float(row.lyrics_score), 4),
+            rational_score=round(float(row.rational_score), 4),
+        )
+        for row in rows
+    ]
+
+
+async def _hybrid_search_in_memory(
+    index: VectorIndex, user_query: str, query_vec: list[float], intent: dict,
+    weights: dict, top_k: int,
+) -> list[SongSearchResult]:
+    """
+    内存向量后端的混合检索
+
+    全库双向量相似度一次矩阵乘算出，argpartition 取向量融合分 Top-N 作为候选；
+    SQL 只按 id 取候选（及关键词召回）的展示字段和 rational 分，最终融合在 Python 中完成。
+    """
+    threshold = settings.SEARCH_SCORE_THRESHOLD
+    pool = settings.SEARCH_CANDIDATE_POOL
+    use_lexical = weights["rational"] > 0
+
+    def _score():
+        review_sim, lyrics_sim = index.similarities(query_vec)
+        eligible = index.active & ((review_sim > threshold) | (lyrics_sim > threshold))
+        fused = np.where(
+            eligible,
+            review_sim * weights["review"] + lyrics_sim * weights["lyrics"],
+            -np.inf,
+        )
+        return review_sim, lyrics_sim, eligible, index.top_indices(fused, pool)
+
+    review_sim, lyrics_sim, eligible, top = await asyncio.to_thread(_score)
+
+    lexical_with = f"WITH {_lexical_candidates_cte(intent)}" if use_lexical else ""
+    lexical_filter = "OR s.id IN (SELECT id FROM lexical_candidates)" if use_lexical else ""
+    fetch_sql = sql_text(f"""
+        {lexical_with}
+        SELECT
+            s.id, s.title, s.artist, s.album_cover,
+            s.vibe_tags, s.review_text, s.core_lyrics,
+            ({_RATIONAL_SCORE_SQL}) AS rational_score
+        FROM songs s
+        WHERE s.id = ANY(CAST(:ids AS text[]))
+           {lexical_filter}
+    """)
+    lexical_params = await _lexical_params(user_query, intent)
+    async with session_scope() as db:
+        result = await db.execute(fetch_sql, {
+            **lexical_params,
+            "ids": [index.ids[i] for i in top],
+            "pool": pool,
+        })
+        rows = result.fetchall()
+
+    scored = []
+    for row in rows:
+        i = index.row_of(row.id)
+        if i is None or not eligible[i]:
+            continue
+        rational = float(row.rational_score)
+        final = (
+            float(review_sim[i]) * weights["review"]
+            + float(lyrics_sim[i]) * weights["lyrics"]
+            + min(rational, 4.0) / 4.0 * weights["rational"]
+        )
+        scored.append((final, i, rational, row))
+    scored.sort(key=lambda x: x[0], reverse=True)
+
+    return [
+        SongSearchResult(
+            id=row.id,
+            title=row.title,
+            artist=row.artist,
+            album_cover=row.album_cover,
+            review_text=row.review_text,
+            vibe_tags=row.vibe_tags,
+            core_lyrics=row.core_lyrics,
+            score=round(final, 4),
+            review_score=round(float(review_sim[i]), 4),
+            lyrics_score=round(float(lyrics_sim[i]), 4),
+            rational_score=round(rational, 4),
+        )
+        for final, i, rational, row in scored[:top_k]
+    ]
+
+
+async def _hybrid_search_rrf(
+    user_query: str, query_vec: list[float], intent: dict,
+    weights: dict, top_k: int,
+) -> list[SongSearchResult]:
+    """
+    RRF 混合检索
+
+    review HNSW / lyrics HNSW / 关键词 (search_tsv + 歌手歌名) 三路各取 Top-N，
+    分别在独立连接上并发执行（内存后端时两路向量排名由一次矩阵乘完成），按名次加权融合。
+    权重为 0 的一路不检索；只被向量召回的歌曲仍需超过相似度阈值。
+    """
+    pool = settings.SEARCH_CANDIDATE_POOL
+    k = settings.SEARCH_RRF_K
+    use_lexical = weights["rational"] > 0
+    lexical_params = await _lexical_params(user_query, intent)
+
+    index = get_vector_index()
+    if index is not None:
+        vector_ranks = memory_rank_ids(index, query_vec, None, pool)
+    else:
+        async def _sql_vector_ranks():
+            return await asyncio.gather(
+                vector_rank_ids("review_vector", query_vec, pool) if weights["review"] > 0 else no_ranks(),
+                vector_rank_ids("lyrics_vector", query_vec, pool) if weights["lyrics"] > 0 else no_ranks(),
+            )
+        vector_ranks = _sql_vector_ranks()
+
+    (review_ids, lyrics_ids), lexical_ids = await asyncio.gather(
+        vector_ranks,
+        _lexical_rank_ids(lexical_params, intent, pool) if use_lexical else no_ranks(),
+    )
+    fused = rrf_merge([
+        (review_ids, weights["review"]),
+        (lyrics_ids, weights["lyrics"]),
+        (lexical_ids, weights["rational"]),
+    ], k)
+    if not fused:
+        return []
+    max_score = rrf_max_score([weights["review"], weights["lyrics"], weights["rational"]], k)
+    rrf_scores = dict(fused)
+    lexical_hits = set(lexical_ids)
+
+    # 按融合名次分批回表，阈值过滤后凑满 top_k 条或候选耗尽为止
+    fetch_sql = sql_text(f"""
+        SELECT
+            s.id, s.title, s.artist, s.album_cover,
+            s.vibe_tags, s.review_text, s.core_lyrics,
+            (1 - (s.review_vector <=> CAST(:q_vec AS vector))) AS review_score,
+            COALESCE(1 - (s.lyrics_vector <=> CAST(:q_vec AS vector)), 0) AS lyrics_score,
+            ({_RATIONAL_SCORE_SQL}) AS rational_score
+        FROM songs s
+        WHERE s.id = ANY(CAST(:ids AS text[]))
+    """)
+    threshold = settings.SEARCH_SCORE_THRESHOLD
+    batch = max(top_k * 2, 1)
+    rows = []
+    async with session_scope() as db:
+        for start in range(0, len(fused), batch):
+            result = await db.execute(fetch_sql, {
+                **lexical_params,
+                "q_vec": str(query_vec),
+                "ids": [song_id for song_id, _ in fused[start:start + batch]],
+            })
+            rows.extend(
+                row for row in result.fetchall()
+                if row.id in lexical_hits or row.review_score > threshold or row.lyrics_score > threshold
+            )
+            if len(rows) >= top_k:
+                break
+    rows.sort(key=lambda row: rrf_scores[row.id], reverse=True)
+
+    return [
+        SongSearchResult(
+            id=row.id,
+            title=row.title,
+            artist=row.artist,
+            album_cover=row.album_cover,
+            review_text=row.review_text,
+            vibe_tags=row.vibe_tags,
+            core_lyrics=row.core_lyrics,
+            score=round(rrf_scores[row.id] / max_score, 4),
+            review_score=round(float(row.review_score), 4),
+            lyrics_score=round(float(row.lyrics_score), 4),
+            rational_score=round(float(row.rational_score), 4),
+        )
+        for row in rows[:top_k]
+    ]
+
+
+def get_search_cache_stats() -> dict:
+    """搜索响应缓存的命中统计"""
+    return {
+        **_search_stats.snapshot(),
+        "size": len(_search_cache),
+        "maxsize": _search_cache.maxsize,
+        "generation": current_generation(),
+        "speculation": dict(_speculation_stats),
+        "cursors": len(_result_sets),
+    }
+
+
+class InvalidCursor(Exception):
+    """翻页游标无效或已过期"""
+
+
+def _search_cache_key(user_query: str, mode: str | None, fusion: str) -> tuple:
+    return (current_generation(), normalize_query(user_query), mode or "auto", fusion)
+
+
+def _store_result_set(list_key: tuple | None, full: SearchResponse) -> str:
+    """
+    暂存完整排序列表供翻页，返回 result_set_id
+
+    已写缓存的列表按其缓存 key（含数据版本号）派生固定 id：热门查询反复命中缓存时复用同一条记录
+    （并刷新过期时间），不会挤掉其他用户正在翻页的列表；不写缓存的结果每次新建。
+    """
+    if list_key is not None and _cacheable(full):
+        result_set_id = hashlib.blake2b(repr(list_key).encode(), digest_size=12).hexdigest()
+    else:
+        result_set_id = secrets.token_urlsafe(12)
+    _result_sets[result_set_id] = full
+    return result_set_id
+
+
+def _paginate(
+    full: SearchResponse, user_query: str, offset: int, top_k: int,
+    list_key: tuple | None = None, result_set_id: str | None = None,
+) -> SearchResponse:
+    """从完整排序列表中切出一页；后面还有结果时附带下一页游标"""
+    next_cursor = None
+    if offset + top_k < len(full.results):
+        if result_set_id is None:
+            result_set_id = _store_result_set(list_key, full)
+        next_cursor = f"{result_set_id}.{offset + top_k}"
+    return full.model_copy(update={
+        "query": user_query,
+        "results": full.results[offset:offset + top_k],
+        "next_cursor": next_cursor,
+    })
+
+
+def _page_from_cursor(cursor: str, top_k: int) -> SearchResponse:
+    result_set_id, _, offset = cursor.rpartition(".")
+    full = _result_sets.get(result_set_id)
+    if full is None or not offset.isdigit():
+        raise InvalidCursor(cursor)
+    return _paginate(full, full.query, int(offset), top_k, result_set_id=result_set_id)
+
+
 async def perform_hybrid_search(
-    user_query: str, top_k: int, db: AsyncSession,
+    user_query: str, top_k: int,
     mode: str | None = None,
+    cursor: str | None = None,
+    fusion: str = "weighted",
+    dedupe: bool = False,
+    diversity: float | None = None,
+    artist_cap: int | None = None,
+) -> SearchResponse:
+    """
+    带响应缓存的搜索入口
+
+    每次检索产出长度为 SEARCH_RESULT_POOL 的完整排序列表，按 top_k 切出第一页；
+    后面还有结果时返回 next_cursor，带 cursor 的请求直接从暂存的列表切片（忽略 user_query / mode），
+    不调用 LLM / Embedding，也不访问数据库。游标过期或无效时抛出 InvalidCursor。
+
+    fusion=weighted (默认) 为三路分数加权求和；fusion=rrf 为各路独立检索后按名次融合。
+
+    key = (数据版本号, 归一化查询, mode, fusion)。命中时直接返回缓存的 SearchResponse，
+    不访问数据库连接池，也不调用 LLM / Embedding；批处理更新数据后版本号变化，旧缓存自然失效。
+    未命中时相同 key 的并发请求经 singleflight 合并，只执行一次。
+
+    整个请求受 SEARCH_DEADLINE_MS 约束，LLM / Embedding 调用只能使用剩余时间；
+    上游超时或熔断时降级为纯关键词检索，降级结果不写缓存；LLM 不可用时按降级意图检索的结果
+    (provisional) 同样不写缓存。
+
+    dedupe=True 时在完整排序列表上按 songs.base_title 去重（SQL DISTINCT ON），每个主标题只保留
+    排名最高的一首；去重后的列表单独缓存，翻页游标同样基于去重后的列表。
+    diversity / artist_cap 时对完整排序列表做 MMR 多样性重排（同样单独缓存、可翻页）。
+    """
+    if cursor:
+        return _page_from_cursor(cursor, top_k)
+
+    cache_key = _search_cache_key(user_query, mode, fusion)
+    response = _search_cache.get(cache_key)
+    if response is not None:
+        _search_stats.hits += 1
+    else:
+        with deadline_scope(settings.SEARCH_DEADLINE_MS / 1000):
+            response = await _search_flight.do(
+                cache_key, lambda: _search_and_store(cache_key, user_query, mode, fusion)
+            )
+    if dedupe:
+        cache_key = (*cache_key, "dedupe")
+        response = await _deduped_response(cache_key, response)
+    if diversity or artist_cap:
+        cache_key = (*cache_key, "mmr", diversity, artist_cap)
+        response = await _diversified_response(cache_key, response, diversity, artist_cap)
+    return _paginate(response, user_query, 0, top_k, cache_key)
+
+
+async def _deduped_response(dedupe_key: tuple, full: SearchResponse) -> SearchResponse:
+    """完整排序列表按主标题去重后的版本（与原列表共用缓存）"""
+    cached = _search_cache.get(dedupe_key)
+    if cached is not None:
+        return cached
+    kept = set(await distinct_base_titles([item.id for item in full.results]))
+    deduped = full.model_copy(update={"results": [item for item in full.results if item.id in kept]})
+    if _cacheable(full):
+        _search_cache[dedupe_key] = deduped
+    return deduped
+
+
+async def _diversified_response(
+    mmr_key: tuple, full: SearchResponse, diversity: float | None, artist_cap: int | None,
+) -> SearchResponse:
+    """完整排序列表的 MMR 重排版本（与原列表共用缓存）"""
+    cached = _search_cache.get(mmr_key)
+    if cached is not None:
+        return cached
+    results = await diversify(full.results, len(full.results), diversity, artist_cap)
+    diversified = full.model_copy(update={"results": results})
+    if _cacheable(full):
+        _search_cache[mmr_key] = diversified
+    return diversified
+
+
+async def _search_and_store(
+    cache_key: tuple, user_query: str, mode: str | None, fusion: str,
+) -> SearchResponse:
+    _search_stats.misses += 1
+    t0 = time.perf_counter()
+    response = await _run_search(user_query, settings.SEARCH_RESULT_POOL, mode, fusion)
+    _search_stats.upstream_seconds += time.perf_counter() - t0
+
+    if _cacheable(response):
+        _search_cache[cache_key] = response
+    return response
+
+
+def _cacheable(response: SearchResponse) -> bool:
+    """降级结果与基于降级意图的结果只在本次请求中使用，上游恢复后重新检索"""
+    return not (response.degraded or response.provisional)
+
+
+async def _run_search(
+    user_query: str, top_k: int,
+    mode: str | None = None, fusion: str = "weighted",
+) -> SearchResponse:
+    """执行搜索；LLM / Embedding 不可用时降级为纯关键词检索"""
+    try:
+        return await _route_search(user_query, top_k, mode, fusion)
+    except UpstreamUnavailable as e:
+        logger.warning(f"Search degraded to lexical for query '{user_query}': {e}")
+        return await _degraded_search(user_query, top_k)
+
+
+async def _route_search(
+    user_query: str, top_k: int,
+    mode: str | None = None, fusion: str = "weighted",
 ) -> SearchResponse:
     """执行混合搜索并返回结构化结果
 
-    mode=None/auto : LLM 自动识别意图（默认）
+    mode=None/auto : 本地词典快速匹配歌手/歌名，未命中再由 LLM 识别意图（默认）
     mode=vibe      : 直接走氛围语义，跳过 LLM
     mode=exact     : 直接走精确关键词匹配，跳过 LLM 和 Embedding
     """
 
-    # ── 手动指定 title 模式：直接按歌名 ILIKE 匹配 ──
+    # ── 手动指定 title 模式：直接按歌名匹配（ILIKE + trigram 相似度）──
     if mode == "title":
-        results = await _exact_search({"title": user_query}, top_k, db)
+        results = await _exact_search({"title": user_query}, top_k)
         return SearchResponse(query=user_query, intent_type="exact", results=results)
 
-    # ── 手动指定 artist 模式：直接按歌手 ILIKE 匹配 ──
+    # ── 手动指定 artist 模式：直接按歌手匹配（ILIKE + trigram 相似度）──
     if mode == "artist":
-        results = await _exact_search({"artist": user_query}, top_k, db)
+        results = await _exact_search({"artist": user_query}, top_k)
         return SearchResponse(query=user_query, intent_type="exact", results=results)
 
     # ── 手动指定 vibe 模式：跳过 LLM，直接氛围语义搜索 ──
@@ -113,6 +729,7 @@ async def perform_hybrid_search(
         intent_type = "vibe"
         weights = WEIGHT_MAP["vibe"]
         intent = {}
+        provisional = False
 
     # ── 手动指定 lyrics 模式：跳过 LLM，歌词向量 + 关键词混合 ──
     elif mode == "lyrics":
@@ -120,9 +737,24 @@ async def perform_hybrid_search(
         intent_type = "lyrics"
         weights = WEIGHT_MAP["lyrics"]
         intent = {}
+        provisional = False
 
     else:
-        # ── 自动模式：LLM 意图解析 与 Embedding 向量化 并发执行 ──
+        # ── 自动模式：先查本地曲库词典，命中歌手/歌名直接精确匹配，跳过 LLM 和 Embedding ──
+        local_intent = match_exact_intent(user_query)
+        if local_intent:
+            results = await _exact_search(local_intent, top_k)
+            if results:
+                return SearchResponse(query=user_query, intent_type="exact", results=results)
+
+        # Embedding 熔断期间不再等待 LLM，直接降级
+        if not embedding_available():
+            return await _degraded_search(user_query, top_k)
+
+        if settings.SEARCH_SPECULATIVE:
+            return await _speculative_auto_search(user_query, top_k, fusion)
+
+        # ── LLM 意图解析 与 Embedding 向量化 并发执行 ──
         intent, query_vec = await asyncio.gather(
             parse_search_intent(user_query),
             get_embedding(user_query),
@@ -130,10 +762,11 @@ async def perform_hybrid_search(
 
         intent_type = intent.get("type", "vibe")
         weights = WEIGHT_MAP.get(intent_type, WEIGHT_MAP["vibe"])
+        provisional = bool(intent.get("fallback"))
 
         # exact 类型：有明确歌手或歌名，直接精确匹配，跳过向量计算
         if intent_type == "exact" and (intent.get("artist") or intent.get("title")):
-            results = await _exact_search(intent, top_k, db)
+            results = await _exact_search(intent, top_k)
             # 精确匹配无结果时降级为混合搜索
             if results:
                 return SearchResponse(query=user_query, intent_type=intent_type, results=results)
@@ -143,74 +776,146 @@ async def perform_hybrid_search(
         if vibe_query != user_query:
             query_vec = await get_embedding(vibe_query)
 
-    # 2. 关键词分词
-    cleaned_words = _clean_query_words(user_query)
-    ts_query = " | ".join(cleaned_words)
-
-    # 3. 混合 SQL (双向量 + TF-IDF + 精确匹配)
-    search_sql = sql_text("""
-        WITH scoring_pool AS (
-            SELECT
-                id, title, artist, album_cover,
-                vibe_tags, review_text, core_lyrics,
-                (1 - (review_vector <=> CAST(:q_vec AS vector))) AS review_score,
-                COALESCE(1 - (lyrics_vector <=> CAST(:q_vec AS vector)), 0) AS lyrics_score,
-                (
-                    CASE WHEN artist ILIKE :artist_q THEN 4.0 ELSE 0 END +
-                    CASE WHEN title ILIKE :title_q THEN 3.0 ELSE 0 END +
-                    ts_rank_cd(
-                        to_tsvector('simple', title || ' ' || artist || ' ' || COALESCE(segmented_lyrics, '')),
-                        to_tsquery('simple', :ts_q)
-                    )
-                ) AS rational_score
-            FROM songs
-            WHERE review_vector IS NOT NULL
-              AND is_duplicate = false
-        )
-        SELECT *,
-               (review_score * :w_rev
-                + lyrics_score * :w_lyr
-                + LEAST(rational_score, 4.0) / 4.0 * :w_rat
-               ) AS final_score
-        FROM scoring_pool
-        WHERE review_score > :threshold OR lyrics_score > :threshold
-        ORDER BY final_score DESC
-        LIMIT :limit
-    """)
-
-    result = await db.execute(search_sql, {
-        "q_vec": str(query_vec),
-        "ts_q": ts_query,
-        "artist_q": f"%{intent['artist']}%" if intent.get("artist") else "%__NONE__%",
-        "title_q": f"%{intent['title']}%" if intent.get("title") else "%__NONE__%",
-        "w_rev": weights["review"],
-        "w_lyr": weights["lyrics"],
-        "w_rat": weights["rational"],
-        "threshold": settings.SEARCH_SCORE_THRESHOLD,
-        "limit": top_k,
-    })
-    rows = result.fetchall()
-
-    # 4. 组装响应（含可解释性子分数）
-    results = [
-        SongSearchResult(
-            id=row.id,
-            title=row.title,
-            artist=row.artist,
-            album_cover=row.album_cover,
-            review_text=row.review_text,
-            vibe_tags=row.vibe_tags,
-            core_lyrics=row.core_lyrics,
-            score=round(float(row.final_score), 4),
-            review_score=round(float(row.review_score), 4),
-            lyrics_score=round(float(row.lyrics_score), 4),
-            rational_score=round(float(row.rational_score), 4),
-        )
-        for row in rows
-    ]
+    results = await _hybrid_search(user_query, query_vec, intent, weights, top_k, fusion)
 
     return SearchResponse(
         query=user_query,
         intent_type=intent_type,
         results=results,
+        provisional=provisional,
+    )
+
+
+async def _speculative_vibe_search(
+    user_query: str, embedding_task: asyncio.Future, top_k: int, fusion: str,
+) -> list[SongSearchResult]:
+    """投机分支：原句向量一到即跑 vibe 混合检索（SQL 自行借用连接，可与精确匹配并行）"""
+    query_vec = await embedding_task
+    return await _hybrid_search(user_query, query_vec, {}, WEIGHT_MAP["vibe"], top_k, fusion)
+
+
+async def _speculative_auto_search(
+    user_query: str, top_k: int, fusion: str,
+) -> SearchResponse:
+    """
+    auto 模式投机流水线
+
+    LLM 意图解析、原句 Embedding 同时发出；Embedding 返回后立即开始 vibe 混合检索，不等 LLM。
+    意图到达后：
+      - exact 且有歌手/歌名 → 跑精确匹配（与投机检索各用一条连接并行），有结果即返回
+      - vibe 且未改写查询   → 投机结果与串行流程等价，直接采用
+      - 其他               → 取消投机任务，按意图权重与改写后的 vibe 重新检索
+    意图超出 SEARCH_INTENT_BUDGET_MS 时直接采用投机结果（provisional，不写响应缓存），
+    意图解析在后台完成并写入意图缓存，下次相同查询按真实意图检索。
+    """
+    intent_task = asyncio.ensure_future(parse_search_intent(user_query))
+    embedding_task = asyncio.ensure_future(get_embedding(user_query))
+    speculative = asyncio.ensure_future(_speculative_vibe_search(user_query, embedding_task, top_k, fusion))
+    # 被丢弃的投机任务若以异常结束，不再产生 "exception was never retrieved" 警告
+    for task in (embedding_task, speculative):
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    try:
+        budget = settings.SEARCH_INTENT_BUDGET_MS / 1000 or None
+        try:
+            intent = await asyncio.wait_for(asyncio.shield(intent_task), budget)
+        except asyncio.TimeoutError:
+            _speculation_stats["intent_timeouts"] += 1
+            _speculation_stats["used"] += 1
+            _background_tasks.add(intent_task)
+            intent_task.add_done_callback(_background_tasks.discard)
+            return SearchResponse(
+                query=user_query, intent_type="vibe", results=await speculative, provisional=True,
+            )
+
+        intent_type = intent.get("type", "vibe")
+        if intent_type == "exact" and (intent.get("artist") or intent.get("title")):
+            results = await _exact_search(intent, top_k)
+            # 精确匹配无结果时降级为混合搜索
+            if results:
+                _speculation_stats["discarded"] += 1
+                return SearchResponse(query=user_query, intent_type=intent_type, results=results)
+
+        vibe_query = intent.get("vibe") or user_query
+        if intent_type == "vibe" and vibe_query == user_query:
+            _speculation_stats["used"] += 1
+            return SearchResponse(
+                query=user_query, intent_type="vibe", results=await speculative,
+                provisional=bool(intent.get("fallback")),
+            )
+
+        _speculation_stats["discarded"] += 1
+        speculative.cancel()
+        weights = WEIGHT_MAP.get(intent_type, WEIGHT_MAP["vibe"])
+        query_vec = await get_embedding(vibe_query)
+        results = await _hybrid_search(user_query, query_vec, intent, weights, top_k, fusion)
+        return SearchResponse(query=user_query, intent_type=intent_type, results=results)
+    finally:
+        # 精确匹配返回时 Embedding 可能仍在进行：取消本地等待（singleflight 共享的请求会继续完成并写入向量缓存）
+        speculative.cancel()
+        embedding_task.cancel()
+
+
+async def _semantic_preview(
+    user_query: str, top_k: int, fusion: str,
+) -> list[SongSearchResult] | None:
+    """原句向量的 vibe 混合检索（渐进式搜索的中间结果），Embedding 不可用时返回 None"""
+    try:
+        query_vec = await get_embedding(user_query)
+    except UpstreamUnavailable:
+        return None
+    return await _hybrid_search(user_query, query_vec, {}, WEIGHT_MAP["vibe"], top_k, fusion)
+
+
+async def stream_hybrid_search(
+    user_query: str, top_k: int,
+    mode: str | None = None, fusion: str = "weighted",
+) -> AsyncIterator[tuple[str, SearchResponse]]:
+    """
+    渐进式搜索：按完成顺序产出 (阶段, SearchResponse)，供 SSE 接口使用
+
+      exact    — 本地词典命中走精确匹配，否则走关键词检索；只查数据库，毫秒级返回
+      semantic — auto 模式下原句 Embedding 返回后的 vibe 混合检索（先于 LLM 意图）
+      final    — 与 GET /search 完全一致的最终排序（经响应缓存 / singleflight）
+
+    最终结果在后台与前两个阶段并行计算；先完成的阶段若晚于 final 则不再产出。
+    响应缓存命中时只产出 final。
+    """
+    cached = _search_cache.get(_search_cache_key(user_query, mode, fusion))
+    if cached is not None or mode in ("title", "artist"):
+        yield "final", await perform_hybrid_search(user_query, top_k, mode=mode, fusion=fusion)
+        return
+
+    final_task = asyncio.ensure_future(
+        perform_hybrid_search(user_query, top_k, mode=mode, fusion=fusion)
     )
+    semantic_task: asyncio.Future | None = None
+    try:
+        local_intent = match_exact_intent(user_query) if mode in (None, "auto") else None
+        if local_intent:
+            fast = await _exact_search(local_intent, top_k)
+            fast_type = "exact"
+        else:
+            fast = await _lexical_search(user_query, top_k)
+            fast_type = "lexical"
+        if fast and not final_task.done():
+            yield "exact", SearchResponse(query=user_query, intent_type=fast_type, results=fast)
+
+        # 本地词典命中时最终结果就是精确匹配；vibe / lyrics 模式的语义结果即最终结果
+        if mode in (None, "auto") and not (local_intent and fast) and not final_task.done():
+            semantic_task = asyncio.ensure_future(_semantic_preview(user_query, top_k, fusion))
+            done, _ = await asyncio.wait({semantic_task, final_task}, return_when=asyncio.FIRST_COMPLETED)
+            if (
+                final_task not in done
+                and not semantic_task.exception()
+                and semantic_task.result()
+            ):
+                yield "semantic", SearchResponse(
+                    query=user_query, intent_type="vibe", results=semantic_task.result()
+                )
+
+        yield "final", await final_task
+    finally:
+        # 客户端断开时停止等待；共享的搜索任务由 singleflight 继续完成并写入缓存
+        final_task.cancel()
+        if semantic_task is not None:
+            semantic_task.cancel()
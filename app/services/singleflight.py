@@ -0,0 +1,50 @@
+"""
+Singleflight 请求合并
+
+同一 key 的并发调用只真正执行一次，其余调用者等待同一个 in-flight Task：
+  - 结果与异常都会传递给所有等待者
+  - Task 结束后立即移除，异常不会被缓存，下一次调用重新执行
+  - 等待方使用 asyncio.shield，单个调用者取消不会中断共享的执行
+"""
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+_registry: list["SingleFlight"] = []
+
+
+class SingleFlight:
+    """按 key 合并并发调用"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.coalesced = 0
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        _registry.append(self)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """key 已有执行中的调用时等待其结果，否则执行 fn()"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 所有等待者都已取消时，避免 "exception was never retrieved" 警告
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {"inflight": len(self._inflight), "coalesced": self.coalesced}
+
+
+def get_singleflight_stats() -> dict:
+    """各 singleflight 实例的合并统计"""
+    return {flight.name: flight.stats() for flight in _registry}
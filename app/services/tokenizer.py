@@ -0,0 +1,83 @@
+"""
+jieba 分词服务
+
+jieba 首次分词时才构建前缀词典（约 1 秒），且分词本身是同步 CPU 计算。这里：
+  1. 启动时在 lifespan 中预热（warm_up_tokenizer），冷启动 worker 不再阻塞首批请求
+  2. 分词放到专用的单线程执行器，不占用事件循环
+  3. 短查询的分词结果进入 LRU 缓存，热门搜索词直接命中
+  4. 曲库的歌手名 / 歌名作为用户词典加载，保证 "陈奕迅"、"晴天" 这类词不被切开
+
+jieba 的词典 (FREQ / total) 不是线程安全的：initialize / 分词 / add_word 全部在同一个线程上执行，
+天然串行，无需加锁（纯 Python 分词本就持有 GIL，多线程也不会更快）。
+词典增量更新拆成多个小任务提交，任务之间排队的分词请求可以先执行。
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
+
+import jieba
+from cachetools import LRUCache
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+jieba.setLogLevel(logging.WARNING)
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jieba")
+_token_cache: LRUCache = LRUCache(maxsize=settings.TOKENIZER_CACHE_SIZE)
+# 超过该长度的文本不缓存（长文本重复率低，只会挤占缓存）
+_CACHEABLE_LEN = 64
+
+_catalog_words: set[str] = set()
+# 每个任务加入用户词典的词数（任务之间让排队的分词先执行）
+_ADD_WORDS_BATCH = 1000
+
+
+async def warm_up_tokenizer() -> None:
+    """构建 jieba 前缀词典（在线程池中执行）"""
+    t0 = time.perf_counter()
+    await asyncio.get_running_loop().run_in_executor(_executor, jieba.initialize)
+    logger.info(f"jieba initialized in {time.perf_counter() - t0:.2f}s")
+
+
+def _add_words(words: list[str]) -> None:
+    for word in words:
+        jieba.add_word(word)
+
+
+async def load_catalog_words(words: Iterable[str]) -> None:
+    """把曲库歌手名 / 歌名加入 jieba 用户词典，只增量添加新词"""
+    new_words = [w for w in {w.strip() for w in words} if len(w) >= 2 and w not in _catalog_words]
+    if not new_words:
+        return
+    loop = asyncio.get_running_loop()
+    for start in range(0, len(new_words), _ADD_WORDS_BATCH):
+        await loop.run_in_executor(_executor, _add_words, new_words[start:start + _ADD_WORDS_BATCH])
+    _catalog_words.update(new_words)
+    # 词典变化后旧的分词结果可能不再准确
+    _token_cache.clear()
+    logger.info(f"jieba user dictionary: +{len(new_words)} catalog words ({len(_catalog_words)} total)")
+
+
+async def tokenize(text: str) -> list[str]:
+    """jieba 精确模式分词（线程池执行，短文本走缓存）"""
+    cached = _token_cache.get(text)
+    if cached is not None:
+        return list(cached)
+    words = await asyncio.get_running_loop().run_in_executor(_executor, jieba.lcut, text)
+    if len(text) <= _CACHEABLE_LEN:
+        _token_cache[text] = tuple(words)
+    return words
+
+
+def get_tokenizer_stats() -> dict:
+    """分词缓存与用户词典规模"""
+    return {
+        "cache_size": len(_token_cache),
+        "cache_maxsize": _token_cache.maxsize,
+        "catalog_words": len(_catalog_words),
+    }
@@ -0,0 +1,205 @@
+"""
+进程内向量检索引擎 (VECTOR_BACKEND=memory)
+
+5 万首 × 1024 维 float32 的 review / lyrics 向量整体驻留内存，
+检索与推荐只需一次批量矩阵乘 + argpartition 取 Top-K（精确暴力检索），
+再回 PostgreSQL 按 id 取胜出行的展示字段。
+
+向量已按行 L2 归一化，点积即余弦相似度，与 pgvector 的 1 - (a <=> b) 等价。
+索引在后台加载，就绪前 get_vector_index() 返回 None，调用方回退到 SQL 路径。
+
+配置 VECTOR_SNAPSHOT_DIR 时优先 np.memmap 映射离线导出的向量快照
+(见 app/services/vector_snapshot.py)，多 worker 共享同一份 page cache。
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy import text as sql_text
+
+from app.config import get_settings
+from app.database import session_scope
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_LOAD_BATCH = 5000
+# float16 快照没有 BLAS 加速，分块转换为 float32 后再做矩阵乘
+_SCORE_BLOCK = 8192
+
+
+@dataclass
+class VectorIndex:
+    """内存向量矩阵 + id 映射"""
+    ids: list[str]
+    review: np.ndarray        # (n, dim) float32/float16，行已归一化（可为只读 memmap）
+    lyrics: np.ndarray        # (n, dim) 同上，无歌词向量的行为全 0
+    active: np.ndarray        # (n,) bool，is_duplicate = false
+    id_to_row: dict[str, int]
+    loaded_at: float
+    source: str = "postgres"  # 数据来源：postgres 或快照文件路径
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def row_of(self, song_id: str) -> int | None:
+        return self.id_to_row.get(song_id)
+
+    def similarities(
+        self, review_q: np.ndarray, lyrics_q: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """返回全库 (review_sim, lyrics_sim)，lyrics_q 缺省时与 review_q 相同"""
+        review_q = _normalize(np.asarray(review_q, dtype=np.float32))
+        lyrics_q = review_q if lyrics_q is None else _normalize(np.asarray(lyrics_q, dtype=np.float32))
+        return _matvec(self.review, review_q), _matvec(self.lyrics, lyrics_q)
+
+    @staticmethod
+    def top_indices(scores: np.ndarray, k: int) -> np.ndarray:
+        """argpartition 取 Top-K 行号（按分数降序），-inf 的行不会返回"""
+        valid = int(np.isfinite(scores).sum())
+        k = min(k, valid)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        part = np.argpartition(-scores, k - 1)[:k]
+        return part[np.argsort(-scores[part])]
+
+
+def _matvec(mat: np.ndarray, q: np.ndarray) -> np.ndarray:
+    if mat.dtype == np.float32:
+        return mat @ q
+    out = np.empty(mat.shape[0], dtype=np.float32)
+    for start in range(0, mat.shape[0], _SCORE_BLOCK):
+        block = mat[start:start + _SCORE_BLOCK].astype(np.float32)
+        out[start:start + _SCORE_BLOCK] = block @ q
+    return out
+
+
+def _normalize(mat: np.ndarray) -> np.ndarray:
+    """按行 L2 归一化（零向量保持为 0）"""
+    norms = np.linalg.norm(mat, axis=-1, keepdims=True)
+    return np.divide(mat, norms, out=np.zeros_like(mat), where=norms > 0)
+
+
+_index: VectorIndex | None = None
+
+
+def get_vector_index() -> VectorIndex | None:
+    """VECTOR_BACKEND=memory 且索引已加载时返回内存索引，否则返回 None（走 SQL 路径）"""
+    if settings.VECTOR_BACKEND != "memory":
+        return None
+    return _index
+
+
+async def _load_from_db() -> VectorIndex:
+    """
+    按 id 分批 (keyset) 从 songs 表读取全部向量（文本解析在线程池中进行）
+
+    每批单独借用连接，取完即归还：全量加载耗时数分钟，不能整段占用连接池中的一个连接
+    """
+    ids: list[str] = []
+    review_blocks: list[np.ndarray] = []
+    lyrics_blocks: list[np.ndarray] = []
+    active: list[bool] = []
+
+    last_id = ""
+    while True:
+        async with session_scope() as db:
+            result = await db.execute(
+                sql_text("""
+                    SELECT id, review_vector, lyrics_vector, is_duplicate
+                    FROM songs
+                    WHERE review_vector IS NOT NULL
+                      AND id > :last_id
+                    ORDER BY id
+                    LIMIT :limit
+                """),
+                {"last_id": last_id, "limit": _LOAD_BATCH},
+            )
+            rows = result.fetchall()
+        if not rows:
+            break
+        review_block, lyrics_block = await asyncio.to_thread(_parse_rows, rows)
+        review_blocks.append(review_block)
+        lyrics_blocks.append(lyrics_block)
+        ids.extend(row.id for row in rows)
+        active.extend(not row.is_duplicate for row in rows)
+        last_id = rows[-1].id
+
+    dim = review_blocks[0].shape[1] if review_blocks else 1024
+    review = np.vstack(review_blocks) if review_blocks else np.zeros((0, dim), np.float32)
+    lyrics = np.vstack(lyrics_blocks) if lyrics_blocks else np.zeros((0, dim), np.float32)
+    return VectorIndex(
+        ids=ids,
+        review=np.ascontiguousarray(review, dtype=np.float32),
+        lyrics=np.ascontiguousarray(lyrics, dtype=np.float32),
+        active=np.asarray(active, dtype=bool),
+        id_to_row={song_id: i for i, song_id in enumerate(ids)},
+        loaded_at=time.time(),
+    )
+
+
+def _parse_rows(rows) -> tuple[np.ndarray, np.ndarray]:
+    """把一批行解析为归一化后的 (review, lyrics) 矩阵，缺失的歌词向量填 0"""
+    review = np.vstack([_parse_vector(row.review_vector) for row in rows])
+    lyrics = np.zeros_like(review)
+    for i, row in enumerate(rows):
+        if row.lyrics_vector is not None:
+            lyrics[i] = _parse_vector(row.lyrics_vector)
+    return _normalize(review), _normalize(lyrics)
+
+
+def _parse_vector(value) -> np.ndarray:
+    """raw SQL 返回的 vector 为文本 '[0.1,0.2,...]'"""
+    if isinstance(value, str):
+        return np.array(value[1:-1].split(","), dtype=np.float32)
+    return np.asarray(value, dtype=np.float32)
+
+
+async def refresh_vector_index() -> None:
+    """
+    (重新) 加载内存向量索引，失败时保留旧索引
+
+    配置了 VECTOR_SNAPSHOT_DIR 时只检查 CURRENT 指针，版本变化才重新映射；
+    快照不存在时退回到 PostgreSQL 全量读取（仅在尚无索引时）。
+    """
+    global _index
+    if settings.VECTOR_BACKEND != "memory":
+        return
+    t0 = time.perf_counter()
+    try:
+        if settings.VECTOR_SNAPSHOT_DIR:
+            from app.services.vector_snapshot import current_snapshot_path, load_snapshot
+
+            path = current_snapshot_path(settings.VECTOR_SNAPSHOT_DIR)
+            if path is not None:
+                if _index is not None and _index.source == path:
+                    return
+                _index = await asyncio.to_thread(load_snapshot, path)
+            elif _index is None:
+                logger.warning(f"No vector snapshot in {settings.VECTOR_SNAPSHOT_DIR}, loading from database")
+                _index = await _load_from_db()
+            else:
+                return
+        else:
+            _index = await _load_from_db()
+    except Exception as e:
+        logger.warning(f"Vector index load failed: {type(e).__name__}: {e}")
+        return
+    logger.info(
+        f"Vector index loaded from {_index.source}: {len(_index)} songs "
+        f"in {time.perf_counter() - t0:.1f}s"
+    )
+
+
+def get_vector_index_stats() -> dict:
+    """内存向量索引状态"""
+    return {
+        "backend": settings.VECTOR_BACKEND,
+        "loaded": _index is not None,
+        "songs": len(_index) if _index is not None else 0,
+        "bytes": int(_index.review.nbytes + _index.lyrics.nbytes) if _index is not None else 0,
+        "loaded_at": _index.loaded_at if _index is not None else None,
+        "source": _index.source if _index is not None else None,
+    }
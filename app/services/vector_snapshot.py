@@ -0,0 +1,53 @@
+"""
+向量快照加载 — np.memmap 只读映射
+
+快照由 deploy_crawler/export_vector_snapshot.py 在向量化批处理后发布，
+文件格式见该脚本文档。所有 uvicorn worker 映射同一个文件，
+共享一份 page cache，启动时无需再从 PostgreSQL 全表读取向量。
+
+发布方通过原子替换 CURRENT 指针切换版本，这里只需比较指针内容即可热切换。
+"""
+import json
+import os
+import struct
+import time
+
+import numpy as np
+
+from app.services.vector_index import VectorIndex
+
+MAGIC = b"VCVSNAP1"
+
+
+def current_snapshot_path(snapshot_dir: str) -> str | None:
+    """读取 CURRENT 指针，返回当前快照文件路径（不存在时返回 None）"""
+    try:
+        with open(os.path.join(snapshot_dir, "CURRENT")) as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return os.path.join(snapshot_dir, name) if name else None
+
+
+def load_snapshot(path: str) -> VectorIndex:
+    """只读映射快照文件，返回以 memmap 为底层存储的 VectorIndex"""
+    with open(path, "rb") as f:
+        if f.read(8) != MAGIC:
+            raise ValueError(f"Not a vector snapshot: {path}")
+        (header_len,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_len))
+
+    count, dim, dtype = header["count"], header["dim"], header["dtype"]
+    shape = (count, dim)
+    review = np.memmap(path, dtype=dtype, mode="r", offset=header["review_offset"], shape=shape)
+    lyrics = np.memmap(path, dtype=dtype, mode="r", offset=header["lyrics_offset"], shape=shape)
+    ids = header["ids"]
+    return VectorIndex(
+        ids=ids,
+        review=review,
+        lyrics=lyrics,
+        active=np.asarray(header["active"], dtype=bool),
+        id_to_row={song_id: i for i, song_id in enumerate(ids)},
+        loaded_at=time.time(),
+        source=path,
+    )
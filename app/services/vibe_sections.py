@@ -0,0 +1,143 @@
+"""
+首页情绪分区候选池
+
+原先 /api/songs/vibe-sections 每次请求对 5 个分区各跑一次 ORDER BY random() 的全表扫描。
+现在由 main.py 的后台任务定期刷新各分区的合格歌曲 id 池：
+  - 一次查询取出命中任一分区标签的歌曲（vibe_tags ?| ARRAY[...]，走 migrations/009 的 GIN 部分索引），
+    在 Python 中按标签归入各分区
+  - 请求路径上用 random.sample 在内存中抽样，再用一次 id = ANY(...) 主键查询取卡片字段
+首页耗时与曲库规模无关。
+"""
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy import text as sql_text
+
+from app.database import session_scope
+from app.services.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# 首页情绪分区的 tag 分组配置
+_VIBE_SECTIONS = [
+    {"key": "late_night",  "label": "深夜独处", "emoji": "🌙", "tags": ["深夜", "孤独", "寂寞", "失眠", "孤寂"]},
+    {"key": "healing",     "label": "治愈解压", "emoji": "🌿", "tags": ["治愈", "温暖", "解压", "舒缓", "轻盈"]},
+    {"key": "love",        "label": "恋爱心动", "emoji": "💕", "tags": ["恋爱", "甜蜜", "心动", "暗恋", "浪漫"]},
+    {"key": "nostalgic",   "label": "怀旧回忆", "emoji": "📷", "tags": ["怀旧", "回忆", "青春", "遗憾", "思念"]},
+    {"key": "energy",      "label": "元气出发", "emoji": "⚡", "tags": ["活力", "励志", "热血", "元气", "积极"]},
+]
+
+
+@dataclass
+class _SectionPools:
+    ids: dict[str, list[str]] = field(default_factory=dict)   # section key -> 合格歌曲 id
+    loaded_at: float = 0.0
+
+
+_pools = _SectionPools()
+_refresh_flight = SingleFlight("vibe_sections")
+# 池尚未加载时，由请求触发的重试间隔（秒）：数据库故障期间不让每个请求都重跑加载查询
+_RETRY_COOLDOWN = 30.0
+_last_failed_at: float | None = None
+
+
+def _build_pools(rows: list[tuple[str, list]]) -> _SectionPools:
+    """把 (id, vibe_tags) 按标签归入各分区，一首歌可同时属于多个分区"""
+    pools = _SectionPools(ids={s["key"]: [] for s in _VIBE_SECTIONS}, loaded_at=time.time())
+    section_tags = [(s["key"], set(s["tags"])) for s in _VIBE_SECTIONS]
+    for song_id, tags in rows:
+        tags = set(tags or ())
+        for key, wanted in section_tags:
+            if tags & wanted:
+                pools.ids[key].append(song_id)
+    return pools
+
+
+async def refresh_vibe_sections() -> None:
+    """重新加载各分区的候选 id 池，失败时保留旧的池并记录失败时间"""
+    global _pools, _last_failed_at
+    all_tags = sorted({tag for s in _VIBE_SECTIONS for tag in s["tags"]})
+    try:
+        async with session_scope() as db:
+            result = await db.execute(
+                sql_text("""
+                    SELECT id, vibe_tags
+                    FROM songs
+                    WHERE is_duplicate = false
+                      AND review_text IS NOT NULL
+                      AND album_cover IS NOT NULL
+                      AND vibe_tags ?| CAST(:tags AS text[])
+                """),
+                {"tags": all_tags},
+            )
+            rows = [(r.id, r.vibe_tags) for r in result.fetchall()]
+    except Exception as e:
+        logger.warning(f"Vibe section pools refresh failed: {type(e).__name__}: {e}")
+        _last_failed_at = time.monotonic()
+        return
+
+    _pools = _build_pools(rows)
+    _last_failed_at = None
+    logger.info(
+        "Vibe section pools loaded: "
+        + ", ".join(f"{key}={len(ids)}" for key, ids in _pools.ids.items())
+    )
+
+
+async def get_vibe_sections(per_section: int) -> list[dict]:
+    """
+    每个分区从内存池中随机抽 per_section 首，一次查询补齐卡片字段；空分区不返回
+
+    启动预热失败时由请求触发加载（并发请求只加载一次），上次失败后 _RETRY_COOLDOWN 秒内
+    不再重试，池仍为空时返回空列表
+    """
+    if not _pools.loaded_at and (
+        _last_failed_at is None or time.monotonic() - _last_failed_at >= _RETRY_COOLDOWN
+    ):
+        await _refresh_flight.do("pools", refresh_vibe_sections)
+    pools = _pools
+
+    sampled = {
+        key: random.sample(ids, min(per_section, len(ids)))
+        for key, ids in pools.ids.items()
+        if ids and per_section > 0
+    }
+    wanted = list({song_id for ids in sampled.values() for song_id in ids})
+    if not wanted:
+        return []
+
+    async with session_scope() as db:
+        result = await db.execute(
+            sql_text("""
+                SELECT id, title, artist, album_cover
+                FROM songs
+                WHERE id = ANY(CAST(:ids AS text[]))
+            """),
+            {"ids": wanted},
+        )
+        cards = {
+            r.id: {"id": r.id, "title": r.title, "artist": r.artist, "album_cover": r.album_cover}
+            for r in result.fetchall()
+        }
+
+    sections = []
+    for section in _VIBE_SECTIONS:
+        songs = [cards[song_id] for song_id in sampled.get(section["key"], []) if song_id in cards]
+        if songs:
+            sections.append({
+                "key": section["key"],
+                "label": section["label"],
+                "emoji": section["emoji"],
+                "songs": songs,
+            })
+    return sections
+
+
+def get_vibe_section_stats() -> dict:
+    """各分区候选池规模"""
+    return {
+        "sections": {key: len(ids) for key, ids in _pools.ids.items()},
+        "loaded_at": _pools.loaded_at or None,
+    }
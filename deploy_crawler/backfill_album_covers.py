@@ -16,6 +16,7 @@ import time
 import requests
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
+from db_init import bump_data_generation
 
 # ── 数据库配置 ────────────────────────────────────────
 DB_URL = "postgresql://{user}:{password}@{host}:{port}/{db}".format(
@@ -115,6 +116,8 @@ def main():
 
         time.sleep(SLEEP_BETWEEN)
 
+    if updated:
+        bump_data_generation(session)
     session.close()
 
     print(f"\n========== 补录完成 ==========")
@@ -5,7 +5,9 @@ import requests
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, and_, or_, text
 from sqlalchemy.orm import sessionmaker
-from db_init import Song, get_db_url
+from db_init import Song, get_db_url, bump_data_generation
+from export_vector_snapshot import publish_snapshot_if_configured
+from compute_song_neighbors import update_neighbors_if_configured
 
 # 1. 基础配置
 load_dotenv()
@@ -112,6 +114,12 @@ def process_batch_vectorization():
 
         print(f"🎉 全部任务执行完毕，共处理 {processed_count} 首。")
 
+        # 有新向量写入时发布新快照，API 侧检测到 CURRENT 变化后原子切换
+        if processed_count > 0:
+            publish_snapshot_if_configured()
+            update_neighbors_if_configured()
+            bump_data_generation(session)
+
     finally:
         session.close()
 
@@ -0,0 +1,308 @@
+"""
+离线预计算相似歌曲 — 写入 song_neighbors 表
+
+融合公式与 API 的 get_similar_songs 默认权重完全一致：
+  score = 0.5 * cos(review) + 0.4 * cos(lyrics) + 0.1 * cos(TF-IDF 关键词权重)
+  - 源歌曲缺少歌词向量时以评语向量代替；候选缺少歌词向量时 lyrics 项为 0
+  - TF-IDF 余弦只用源歌曲权重最高的 20 个关键词
+  - 候选只包含 is_duplicate = false 且有评语向量的歌曲，不含自身
+
+计算方式：全部向量按行 L2 归一化后载入内存，源歌曲分块 (--block) 与全库做矩阵乘，
+TF-IDF 余弦通过关键词倒排表 + 加权 bincount 计算，argpartition 取每行 Top-K。
+
+全量模式写入暂存表 song_neighbors_staging，算完后在一个事务内替换正式表：
+计算期间 API 照常读取旧的邻居表，中途失败时旧表保持不变。
+
+增量模式 (--incremental) 只重算：
+  1. 没有邻居记录、或 songs.updated_at 晚于 computed_at 的歌曲（新向量化 / 向量更新）
+  2. 邻居列表中包含上述歌曲的源歌曲（分数已变化）
+  3. 上述歌曲的新分数能挤进其 Top-K 的源歌曲
+
+用法:
+  python compute_song_neighbors.py                 # 全量
+  python compute_song_neighbors.py --incremental   # 增量
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.orm import sessionmaker
+from db_init import Song, bump_data_generation, get_db_url
+
+# 与 app/services/recommend.py 中 get_similar_songs 的默认权重保持一致
+W_REVIEW, W_LYRICS, W_TFIDF = 0.5, 0.4, 0.1
+TFIDF_TOP_KEYS = 20
+DEFAULT_K = 100
+DEFAULT_BLOCK = 512
+STAGING_TABLE = "song_neighbors_staging"
+
+engine = create_engine(get_db_url())
+Session = sessionmaker(bind=engine)
+
+
+def _normalize(mat):
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    return np.divide(mat, norms, out=np.zeros_like(mat), where=norms > 0)
+
+
+class Catalog:
+    """全部带评语向量的歌曲：归一化向量矩阵 + TF-IDF 关键词倒排表"""
+
+    def __init__(self, session):
+        ids, review, lyrics, has_lyrics, active, keys = [], [], [], [], [], []
+        query = (
+            session.query(Song.id, Song.review_vector, Song.lyrics_vector, Song.tfidf_vector, Song.is_duplicate)
+            .filter(Song.review_vector != None)
+            .order_by(Song.id)
+            .yield_per(2000)
+        )
+        for song_id, review_vec, lyrics_vec, tfidf, is_duplicate in query:
+            ids.append(song_id)
+            review.append(np.asarray(review_vec, dtype=np.float32))
+            has_lyrics.append(lyrics_vec is not None)
+            lyrics.append(np.asarray(lyrics_vec if lyrics_vec is not None else review_vec, dtype=np.float32))
+            active.append(not is_duplicate)
+            keys.append(
+                sorted(tfidf.items(), key=lambda kv: kv[1], reverse=True) if isinstance(tfidf, dict) else []
+            )
+
+        dim = review[0].shape[0] if review else 1024
+        self.ids = ids
+        self.row_of = {song_id: i for i, song_id in enumerate(ids)}
+        self.review = _normalize(np.vstack(review)) if review else np.zeros((0, dim), np.float32)
+        # 作为源：缺歌词向量时用评语向量；作为候选：缺歌词向量时该项为 0
+        self.lyrics_query = _normalize(np.vstack(lyrics)) if lyrics else np.zeros((0, dim), np.float32)
+        self.lyrics_cand = self.lyrics_query * np.asarray(has_lyrics, dtype=np.float32)[:, None]
+        self.active = np.asarray(active, dtype=bool)
+        # TF-IDF 权重预先除以各自范数（源歌曲只取前 20 个关键词），倒排表中直接存归一化后的权重
+        norms = [np.sqrt(sum(float(w) ** 2 for _, w in items)) for items in keys]
+        self.src_keys = []
+        for items in keys:
+            top = items[:TFIDF_TOP_KEYS]
+            norm = np.sqrt(sum(float(w) ** 2 for _, w in top))
+            self.src_keys.append([(k, float(w) / norm) for k, w in top] if norm else [])
+
+        # 关键词倒排表：key -> (含该关键词的候选行号, 归一化权重)
+        postings = {}
+        for row, (items, norm) in enumerate(zip(keys, norms)):
+            for key, weight in items:
+                postings.setdefault(key, []).append((row, float(weight) / norm))
+        self.postings = {
+            key: (np.asarray([r for r, _ in hits], dtype=np.int64), np.asarray([w for _, w in hits]))
+            for key, hits in postings.items()
+        }
+
+    def __len__(self):
+        return len(self.ids)
+
+    def scores(self, src_rows, cand_rows=None):
+        """源歌曲 (行号列表) 对候选 (默认全库) 的融合分矩阵，不可用的候选为 -inf"""
+        src_rows = np.asarray(src_rows, dtype=np.int64)
+        cand = slice(None) if cand_rows is None else np.asarray(cand_rows, dtype=np.int64)
+        n_cand = len(self) if cand_rows is None else len(cand_rows)
+
+        scores = W_REVIEW * (self.review[src_rows] @ self.review[cand].T)
+        scores += W_LYRICS * (self.lyrics_query[src_rows] @ self.lyrics_cand[cand].T)
+
+        # TF-IDF 余弦：候选子集时先把全库行号映射到子集列号
+        col_of = None
+        if cand_rows is not None:
+            col_of = np.full(len(self), -1, dtype=np.int64)
+            col_of[cand] = np.arange(n_cand)
+        for i, row in enumerate(src_rows):
+            hits = [(self.postings[k], w) for k, w in self.src_keys[row] if k in self.postings]
+            if not hits:
+                continue
+            cols = np.concatenate([rows for (rows, _), _ in hits])
+            weights = np.concatenate([cand_w * src_w for (_, cand_w), src_w in hits])
+            if col_of is not None:
+                cols = col_of[cols]
+                keep = cols >= 0
+                cols, weights = cols[keep], weights[keep]
+            scores[i] += W_TFIDF * np.bincount(cols, weights=weights, minlength=n_cand)
+
+        active = self.active[cand]
+        scores[:, ~active] = -np.inf
+        # 排除自身
+        if cand_rows is None:
+            scores[np.arange(len(src_rows)), src_rows] = -np.inf
+        else:
+            for i, row in enumerate(src_rows):
+                if col_of[row] >= 0:
+                    scores[i, col_of[row]] = -np.inf
+        return scores
+
+
+def _top_k(scores, k):
+    """每行取 Top-K 列号与分数（降序），-inf 的列不返回"""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return [[] for _ in range(scores.shape[0])]
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    results = []
+    for i in range(scores.shape[0]):
+        cols = part[i][np.argsort(-scores[i, part[i]])]
+        results.append([(int(c), float(scores[i, c])) for c in cols if np.isfinite(scores[i, c])])
+    return results
+
+
+def compute_neighbors(session, catalog, src_rows, k=DEFAULT_K, block=DEFAULT_BLOCK, table="song_neighbors"):
+    """分块计算 src_rows 的 Top-K 邻居，覆盖写入 table（song_neighbors 或全量重算的暂存表）"""
+    total = len(src_rows)
+    for start in range(0, total, block):
+        rows = src_rows[start:start + block]
+        tops = _top_k(catalog.scores(rows), k)
+        src_ids = [catalog.ids[r] for r in rows]
+        # 暂存表是新建的空表且尚无索引，无需先删除
+        if table != STAGING_TABLE:
+            session.execute(
+                text(f"DELETE FROM {table} WHERE song_id = ANY(:ids)"),
+                {"ids": src_ids},
+            )
+        records = [
+            {"song_id": src_id, "rank": rank, "neighbor_id": catalog.ids[col], "score": score}
+            for src_id, top in zip(src_ids, tops)
+            for rank, (col, score) in enumerate(top, start=1)
+        ]
+        if records:
+            session.execute(
+                text(f"""
+                    INSERT INTO {table} (song_id, rank, neighbor_id, score)
+                    VALUES (:song_id, :rank, :neighbor_id, :score)
+                """),
+                records,
+            )
+        session.commit()
+        print(f"  ✅ 已完成: {min(start + block, total)}/{total}")
+
+
+def _create_staging_table(session):
+    """全量重算的暂存表：结构与 song_neighbors 相同，索引在写完数据后再建"""
+    session.execute(text(f"DROP TABLE IF EXISTS {STAGING_TABLE}"))
+    session.execute(text(f"CREATE TABLE {STAGING_TABLE} (LIKE song_neighbors INCLUDING DEFAULTS)"))
+    session.commit()
+
+
+def _swap_in_staging_table(session):
+    """建索引后在一个事务内用暂存表替换 song_neighbors（索引名与 migrations/006 一致）"""
+    session.execute(text(f"ALTER TABLE {STAGING_TABLE} ADD CONSTRAINT {STAGING_TABLE}_pkey PRIMARY KEY (song_id, rank)"))
+    session.execute(text(f"CREATE INDEX {STAGING_TABLE}_neighbor ON {STAGING_TABLE} (neighbor_id)"))
+    session.commit()
+
+    session.execute(text("DROP TABLE song_neighbors"))
+    session.execute(text(f"ALTER TABLE {STAGING_TABLE} RENAME TO song_neighbors"))
+    session.execute(text(f"ALTER INDEX {STAGING_TABLE}_pkey RENAME TO song_neighbors_pkey"))
+    session.execute(text(f"ALTER INDEX {STAGING_TABLE}_neighbor RENAME TO idx_song_neighbors_neighbor"))
+    session.commit()
+
+
+def _changed_song_ids(session):
+    """没有邻居记录、或向量更新晚于上次计算的非重复歌曲"""
+    result = session.execute(text("""
+        SELECT s.id
+        FROM songs s
+        LEFT JOIN (
+            SELECT song_id, MIN(computed_at) AS computed_at
+            FROM song_neighbors
+            GROUP BY song_id
+        ) n ON n.song_id = s.id
+        WHERE s.review_vector IS NOT NULL
+          AND s.is_duplicate = false
+          AND (n.song_id IS NULL OR s.updated_at > n.computed_at)
+    """))
+    return [row.id for row in result]
+
+
+def _affected_sources(session, catalog, changed_rows, block):
+    """已有邻居列表因 changed_rows 而可能变化的源歌曲行号"""
+    changed_ids = [catalog.ids[r] for r in changed_rows]
+    affected = set()
+
+    # 1. 邻居列表中已包含变化歌曲的源歌曲
+    result = session.execute(
+        text("SELECT DISTINCT song_id FROM song_neighbors WHERE neighbor_id = ANY(:ids)"),
+        {"ids": changed_ids},
+    )
+    affected.update(catalog.row_of[r.song_id] for r in result if r.song_id in catalog.row_of)
+
+    # 2. 变化歌曲的新分数能超过其当前第 K 名的源歌曲（列表未满时同样需要重算）
+    result = session.execute(text("""
+        SELECT song_id, MIN(score) AS min_score, COUNT(*) AS cnt
+        FROM song_neighbors
+        GROUP BY song_id
+    """))
+    cutoff = {r.song_id: (r.min_score, r.cnt) for r in result}
+    k = max((cnt for _, cnt in cutoff.values()), default=0)
+    sources = [
+        catalog.row_of[song_id] for song_id in cutoff
+        if song_id in catalog.row_of and catalog.active[catalog.row_of[song_id]]
+    ]
+    for start in range(0, len(sources), block):
+        rows = sources[start:start + block]
+        best = catalog.scores(rows, changed_rows).max(axis=1)
+        for row, score in zip(rows, best):
+            min_score, cnt = cutoff[catalog.ids[row]]
+            if np.isfinite(score) and (score > min_score or cnt < k):
+                affected.add(row)
+    return affected
+
+
+def run(incremental=False, k=DEFAULT_K, block=DEFAULT_BLOCK):
+    session = Session()
+    try:
+        t0 = time.time()
+        catalog = Catalog(session)
+        print(f"📦 已载入 {len(catalog)} 首歌曲的向量 ({time.time() - t0:.1f}s)")
+        if not len(catalog):
+            return 0
+
+        if incremental:
+            changed_rows = [catalog.row_of[i] for i in _changed_song_ids(session) if i in catalog.row_of]
+            if not changed_rows:
+                print("✨ 没有需要重算的歌曲")
+                return 0
+            src_rows = sorted(set(changed_rows) | _affected_sources(session, catalog, changed_rows, block))
+            print(f"🔁 增量重算: {len(changed_rows)} 首变化，共 {len(src_rows)} 首需要更新邻居")
+        else:
+            src_rows = [i for i in range(len(catalog)) if catalog.active[i]]
+            print(f"🧮 全量计算: {len(src_rows)} 首 × Top-{k}（写入暂存表 {STAGING_TABLE}）")
+
+        if incremental:
+            compute_neighbors(session, catalog, src_rows, k=k, block=block)
+        else:
+            _create_staging_table(session)
+            compute_neighbors(session, catalog, src_rows, k=k, block=block, table=STAGING_TABLE)
+            _swap_in_staging_table(session)
+        print(f"🎉 相似歌曲计算完成，共 {len(src_rows)} 首 ({time.time() - t0:.1f}s)")
+        return len(src_rows)
+    finally:
+        session.close()
+
+
+def update_neighbors_if_configured():
+    """
+    向量化批处理收尾时调用：设置了 SONG_NEIGHBORS_AUTO=1 才增量更新 song_neighbors
+    表不存在（未执行 007 迁移）时仅打印提示
+    """
+    if os.getenv("SONG_NEIGHBORS_AUTO", "").lower() not in ("1", "true", "yes"):
+        return 0
+    try:
+        return run(incremental=True)
+    except ProgrammingError as e:
+        print(f"⚠️ 相似歌曲增量更新失败 (是否已执行 006_create_song_neighbors.sql?): {e}")
+        return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="离线预计算相似歌曲 (song_neighbors)")
+    parser.add_argument("--incremental", action="store_true", help="只重算新向量化 / 受影响的歌曲")
+    parser.add_argument("--k", type=int, default=DEFAULT_K, help="每首歌保存的邻居数")
+    parser.add_argument("--block", type=int, default=DEFAULT_BLOCK, help="每次矩阵乘的源歌曲数")
+    args = parser.parse_args()
+    if run(incremental=args.incremental, k=args.k, block=args.block):
+        # 通知 API 丢弃基于旧邻居表的推荐缓存（向量化批处理调用时由其自行更新版本号）
+        with Session() as session:
+            bump_data_generation(session)
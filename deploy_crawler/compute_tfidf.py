@@ -1,11 +1,12 @@
 import os
+import math
 import jieba
 import re
 from sqlalchemy import create_engine, and_, text
 from sqlalchemy.orm import sessionmaker
 from sklearn.feature_extraction.text import TfidfVectorizer
 import json
-from db_init import Song, get_db_url
+from db_init import Song, get_db_url, bump_data_generation
 
 # 1. 初始化数据库连接
 engine = create_engine(get_db_url())
@@ -23,6 +24,9 @@ def clean_text(text):
 def segment_all_songs():
     """
     第一阶段：对所有未分词的歌词进行分词
+
+    search_tsv 是基于 segmented_lyrics 的 STORED 生成列，
+    这里写入分词结果后由数据库自动重算，无需额外同步。
     """
     session = Session()
     try:
@@ -52,6 +56,8 @@ def segment_all_songs():
                 
         session.commit()
         print("分词阶段全部完成。")
+        if songs:
+            bump_data_generation(session)
     finally:
         session.close()
 
@@ -110,9 +116,11 @@ def compute_and_save_tfidf(top_n=10):
                 word = feature_names[idx]
                 keywords[word] = round(float(score), 4)
             
-            # 更新到数据库
+            # 更新到数据库 (关键词集合与范数供 GIN 预筛 + 加权余弦使用)
             session.query(Song).filter(Song.id == s_id).update({
-                Song.tfidf_vector: keywords
+                Song.tfidf_vector: keywords,
+                Song.tfidf_keywords: list(keywords),
+                Song.tfidf_norm: math.sqrt(sum(w * w for w in keywords.values())),
             })
             
             if (i + 1) % 500 == 0:
@@ -121,6 +129,7 @@ def compute_and_save_tfidf(top_n=10):
                 
         session.commit()
         print("TF-IDF 关键词处理完毕。")
+        bump_data_generation(session)
     finally:
         session.close()
 
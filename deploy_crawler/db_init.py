@@ -1,9 +1,9 @@
 import os
 import time
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, func, JSON, text, Boolean
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, func, JSON, text, Boolean, Computed
+from sqlalchemy.orm import declarative_base, sessionmaker, deferred
 from pgvector.sqlalchemy import Vector
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, REAL, TSVECTOR
 from sqlalchemy.exc import ProgrammingError
 
 # 数据库配置
@@ -47,12 +47,78 @@ class Song(Base):
     
     # TF-IDF 向量 (使用 JSONB 存储稀疏矩阵或索引)
     tfidf_vector = Column(JSONB, comment='TF-IDF 向量 (JSON)')
+    # 关键词集合 (GIN 索引) 与权重 L2 范数，用于加权余弦相似度 (migrations/007_add_tfidf_keywords.sql)
+    tfidf_keywords = Column(ARRAY(Text), comment='TF-IDF 关键词集合')
+    tfidf_norm = Column(REAL, comment='TF-IDF 关键词权重的 L2 范数')
+
+    # 全文检索物化列 (STORED 生成列)，segmented_lyrics 写入时由数据库自动重算
+    search_tsv = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "to_tsvector('simple', title || ' ' || artist || ' ' || COALESCE(segmented_lyrics, ''))",
+            persisted=True,
+        ),
+        comment='标题+歌手+分词歌词的 tsvector',
+    ))
+
+    # 主标题 (STORED 生成列)，入库 / 改名时由数据库自动计算，规则与 app/services/dedupe.py::base_title 一致
+    base_title = deferred(Column(
+        Text,
+        Computed(
+            "btrim(regexp_replace(regexp_replace(regexp_replace("
+            "title, '[(（\\[【][^)）\\]】]*[)）\\]】]', '', 'g'), "
+            "'(cover|live|remix|dj|翻唱|版|ver\\.?).*$', '', 'i'), "
+            "'\\s+.*$', ''))",
+            persisted=True,
+        ),
+        comment='去掉括号 / 版本后缀后的主标题',
+    ))
     
     album_cover = Column(String(500), nullable=True, comment='专辑封面 URL')
     is_duplicate = Column(Boolean, default=False, comment='是否为重复歌曲')
     created_at = Column(DateTime, default=func.now(), comment='创建时间')
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), comment='最后更新时间')
 
+class DataGeneration(Base):
+    """
+    数据版本号 — 批处理写入影响搜索/推荐结果的数据后 +1，
+    API 侧据此让响应缓存失效 (见 migrations/005_create_data_generation.sql)
+    """
+    __tablename__ = 'data_generation'
+
+    id = Column(Integer, primary_key=True, default=1)
+    generation = Column(Integer, nullable=False, default=0, comment='数据版本号')
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), comment='最后更新时间')
+
+class SongNeighbor(Base):
+    """
+    离线预计算的相似歌曲 (见 compute_song_neighbors.py 与 migrations/006_create_song_neighbors.sql)
+    """
+    __tablename__ = 'song_neighbors'
+
+    song_id = Column(String(50), primary_key=True, comment='源歌曲ID')
+    rank = Column(Integer, primary_key=True, comment='相似度名次 (从 1 开始)')
+    neighbor_id = Column(String(50), nullable=False, comment='相似歌曲ID')
+    score = Column(REAL, nullable=False, comment='默认权重下的融合分')
+    computed_at = Column(DateTime, nullable=False, default=func.now(), comment='计算时间')
+
+def bump_data_generation(session):
+    """
+    数据版本号 +1，通知 API 丢弃基于旧数据的缓存。
+    表不存在（未执行迁移）时仅打印提示，不影响批处理本身。
+    """
+    try:
+        session.execute(text("""
+            INSERT INTO data_generation (id, generation, updated_at)
+            VALUES (1, 1, now())
+            ON CONFLICT (id) DO UPDATE
+            SET generation = data_generation.generation + 1, updated_at = now()
+        """))
+        session.commit()
+    except ProgrammingError as e:
+        session.rollback()
+        print(f"⚠️ 数据版本号更新失败 (是否已执行 005_create_data_generation.sql?): {e}")
+
 def create_database_if_not_exists():
     """
     如果数据库不存在，连接到默认的 'postgres' 数据库并创建目标数据库。
@@ -101,12 +167,48 @@ def init_db():
         with engine.connect() as conn:
             # 启用 vector 插件 (需要超级用户权限，Docker 容器中的 root 用户通常有此权限)
             conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
             conn.commit()
-            print("已启用 'vector' 扩展。")
+            print("已启用 'vector'、'pg_trgm' 扩展。")
 
         # 创建表结构
         Base.metadata.create_all(engine)
         print("表结构创建成功。")
+
+        with engine.connect() as conn:
+            # search_tsv 的 GIN 索引 (与 migrations/002_add_search_tsv.sql 一致)
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_songs_search_tsv_gin "
+                "ON songs USING gin (search_tsv)"
+            ))
+            # title / artist 的 trigram 索引 (与 migrations/004_create_trgm_indexes.sql 一致)
+            for column in ("title", "artist"):
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS idx_songs_{column}_trgm "
+                    f"ON songs USING gin ({column} gin_trgm_ops) WHERE is_duplicate = false"
+                ))
+            # tfidf_keywords 的 GIN 索引，供 && 关键词召回 (与 migrations/007_add_tfidf_keywords.sql 一致)
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_songs_tfidf_keywords_gin "
+                "ON songs USING gin (tfidf_keywords)"
+            ))
+            # base_title 索引，供去重 / 按主标题查找 (与 migrations/008_add_base_title.sql 一致)
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_songs_base_title "
+                "ON songs (base_title) WHERE is_duplicate = false"
+            ))
+            # vibe_tags 的 GIN 部分索引，供首页情绪分区候选池 ?| 查询 (与 migrations/009_create_vibe_tags_gin_index.sql 一致)
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_songs_vibe_tags_gin "
+                "ON songs USING gin (vibe_tags) "
+                "WHERE is_duplicate = false AND review_text IS NOT NULL AND album_cover IS NOT NULL"
+            ))
+            # song_neighbors 反查索引 (与 migrations/006_create_song_neighbors.sql 一致)
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_song_neighbors_neighbor "
+                "ON song_neighbors (neighbor_id)"
+            ))
+            conn.commit()
     except Exception as e:
         print(f"初始化数据库表时出错: {e}")
 
@@ -0,0 +1,180 @@
+"""
+导出向量快照 — 供 API 进程以 np.memmap 只读共享
+
+文件格式（单文件，所有矩阵按 4096 字节页对齐）：
+  [0:8)    魔数 b"VCVSNAP1"
+  [8:16)   header 长度 (uint64, little-endian)
+  [16:...) header JSON: version / count / dim / dtype / review_offset / lyrics_offset / ids / active
+  review_offset 起: review 矩阵 (count × dim，已按行 L2 归一化)
+  lyrics_offset 起: lyrics 矩阵 (count × dim，无歌词向量的行为 0)
+
+发布流程：写临时文件 → fsync → rename 为 vectors-<version>.bin → 原子替换 CURRENT 指针。
+API 侧读取逻辑见 app/services/vector_snapshot.py，两边格式需保持一致。
+
+用法:
+  VECTOR_SNAPSHOT_DIR=/data/vector_snapshot python export_vector_snapshot.py [--dtype float16]
+"""
+import argparse
+import json
+import os
+import struct
+import time
+import uuid
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from db_init import Song, get_db_url
+
+MAGIC = b"VCVSNAP1"
+PAGE_SIZE = 4096
+KEEP_SNAPSHOTS = 2   # 保留最近 N 份快照，旧 worker 仍持有映射时不至于被删
+
+engine = create_engine(get_db_url())
+Session = sessionmaker(bind=engine)
+
+
+def _align(n):
+    return (n + PAGE_SIZE - 1) // PAGE_SIZE * PAGE_SIZE
+
+
+def _normalize(mat):
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    return np.divide(mat, norms, out=np.zeros_like(mat), where=norms > 0)
+
+
+def _new_version():
+    """
+    快照版本号：秒级时间戳 + 纳秒 + 随机后缀，同一秒内多次发布也不会覆盖同名文件；
+    按字典序排序即按发布时间排序（清理旧快照依赖这一点）
+    """
+    now_ns = time.time_ns()
+    stamp = time.strftime("%Y%m%d%H%M%S", time.localtime(now_ns // 1_000_000_000))
+    return f"{stamp}-{now_ns % 1_000_000_000:09d}-{uuid.uuid4().hex[:6]}"
+
+
+def publish_snapshot(snapshot_dir, dtype="float32", dim=1024):
+    """从 songs 表导出全部向量并原子发布为最新快照，返回快照文件路径"""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    session = Session()
+    try:
+        # 1. 先取 id 与去重标记，确定行序和文件布局
+        meta_rows = (
+            session.query(Song.id, Song.is_duplicate)
+            .filter(Song.review_vector != None)
+            .order_by(Song.id)
+            .all()
+        )
+        ids = [r.id for r in meta_rows]
+        row_of = {song_id: i for i, song_id in enumerate(ids)}
+        count = len(ids)
+        itemsize = np.dtype(dtype).itemsize
+        matrix_bytes = count * dim * itemsize
+
+        version = _new_version()
+        header = {
+            "version": version,
+            "count": count,
+            "dim": dim,
+            "dtype": dtype,
+            "ids": ids,
+            "active": [not r.is_duplicate for r in meta_rows],
+        }
+        # header 中的偏移量依赖 header 自身长度，先用占位值估算再回填
+        header["review_offset"] = header["lyrics_offset"] = 0
+        header_len = len(json.dumps(header).encode()) + 64
+        review_offset = _align(16 + header_len)
+        lyrics_offset = _align(review_offset + matrix_bytes)
+        header["review_offset"] = review_offset
+        header["lyrics_offset"] = lyrics_offset
+        header_bytes = json.dumps(header).encode()
+        assert 16 + len(header_bytes) <= review_offset
+
+        final_path = os.path.join(snapshot_dir, f"vectors-{version}.bin")
+        tmp_path = final_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(header_bytes)))
+            f.write(header_bytes)
+            f.truncate(lyrics_offset + matrix_bytes)
+
+        # 2. 流式读取向量写入对应行
+        review = np.memmap(tmp_path, dtype=dtype, mode="r+", offset=review_offset, shape=(count, dim))
+        lyrics = np.memmap(tmp_path, dtype=dtype, mode="r+", offset=lyrics_offset, shape=(count, dim))
+        batch_ids, batch_review, batch_lyrics = [], [], []
+
+        def flush():
+            rows = [row_of[i] for i in batch_ids]
+            review[rows] = _normalize(np.vstack(batch_review)).astype(dtype)
+            lyrics[rows] = _normalize(np.vstack(batch_lyrics)).astype(dtype)
+            batch_ids.clear()
+            batch_review.clear()
+            batch_lyrics.clear()
+
+        query = (
+            session.query(Song.id, Song.review_vector, Song.lyrics_vector)
+            .filter(Song.review_vector != None)
+            .yield_per(2000)
+        )
+        for song_id, review_vec, lyrics_vec in query:
+            if song_id not in row_of:
+                continue   # 导出过程中新写入的歌曲，留给下一次快照
+            batch_ids.append(song_id)
+            batch_review.append(np.asarray(review_vec, dtype=np.float32))
+            batch_lyrics.append(
+                np.asarray(lyrics_vec, dtype=np.float32)
+                if lyrics_vec is not None
+                else np.zeros(dim, dtype=np.float32)
+            )
+            if len(batch_ids) >= 2000:
+                flush()
+        if batch_ids:
+            flush()
+
+        review.flush()
+        lyrics.flush()
+        del review, lyrics
+        with open(tmp_path, "rb+") as f:
+            os.fsync(f.fileno())
+    finally:
+        session.close()
+
+    # 3. 原子发布：先 rename 数据文件，再替换 CURRENT 指针
+    os.replace(tmp_path, final_path)
+    pointer_tmp = os.path.join(snapshot_dir, "CURRENT.tmp")
+    with open(pointer_tmp, "w") as f:
+        f.write(os.path.basename(final_path))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pointer_tmp, os.path.join(snapshot_dir, "CURRENT"))
+    print(f"📦 向量快照已发布: {final_path} ({count} 首, {dtype})")
+
+    # 4. 清理更早的快照（已映射该文件的进程不受影响）
+    snapshots = sorted(
+        name for name in os.listdir(snapshot_dir)
+        if name.startswith("vectors-") and name.endswith(".bin")
+    )
+    for name in snapshots[:-KEEP_SNAPSHOTS]:
+        os.remove(os.path.join(snapshot_dir, name))
+
+    return final_path
+
+
+def publish_snapshot_if_configured():
+    """批处理脚本收尾时调用：设置了 VECTOR_SNAPSHOT_DIR 才导出"""
+    snapshot_dir = os.getenv("VECTOR_SNAPSHOT_DIR")
+    if not snapshot_dir:
+        return None
+    return publish_snapshot(snapshot_dir, dtype=os.getenv("VECTOR_SNAPSHOT_DTYPE", "float32"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="导出向量快照供 API 内存映射")
+    parser.add_argument("--dir", default=os.getenv("VECTOR_SNAPSHOT_DIR"), help="快照目录")
+    parser.add_argument("--dtype", default=os.getenv("VECTOR_SNAPSHOT_DTYPE", "float32"),
+                        choices=["float32", "float16"], help="存储精度")
+    args = parser.parse_args()
+    if not args.dir:
+        print("❌ 错误: 请通过 --dir 或 VECTOR_SNAPSHOT_DIR 指定快照目录")
+    else:
+        publish_snapshot(args.dir, dtype=args.dtype)
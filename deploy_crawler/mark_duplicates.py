@@ -1,7 +1,7 @@
 import re
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from db_init import Song, get_db_url
+from db_init import Song, get_db_url, bump_data_generation
 
 # 1. 初始化数据库连接
 engine = create_engine(get_db_url())
@@ -74,6 +74,7 @@ def mark_duplicates():
             # print(f"  [组内去重] 保留: {original['title']} (ID:{original['id']}), 标记重复: {len(duplicates)} 首")
 
     session.commit()
+    bump_data_generation(session)
     print(f"全部完成！共标记了 {marked_count} 首重复/翻唱歌曲。")
     session.close()
 
@@ -0,0 +1,27 @@
+-- ============================================================
+-- search_tsv 物化列 + GIN 索引 — 搜索时不再对全表逐行 to_tsvector
+--
+-- search_tsv 是 STORED 生成列：INSERT / UPDATE title、artist、
+-- segmented_lyrics 时由 PostgreSQL 自动重算，compute_tfidf.py 写入
+-- 分词结果后无需额外同步。
+--
+-- 执行方式: psql -U root -d music_db -f 002_add_search_tsv.sql
+-- 预计耗时: 约 1~3 分钟（ADD COLUMN 会重写整张表）
+-- ============================================================
+
+-- 1. 生成列（与 app/database.py、deploy_crawler/db_init.py 中的定义一致）
+ALTER TABLE songs
+  ADD COLUMN IF NOT EXISTS search_tsv tsvector
+  GENERATED ALWAYS AS (
+    to_tsvector('simple', title || ' ' || artist || ' ' || COALESCE(segmented_lyrics, ''))
+  ) STORED;
+
+-- 2. GIN 倒排索引（@@ 关键词召回使用）
+CREATE INDEX IF NOT EXISTS idx_songs_search_tsv_gin
+  ON songs USING gin (search_tsv);
+
+-- 验证索引是否创建成功
+SELECT indexname, indexdef
+FROM pg_indexes
+WHERE tablename = 'songs'
+  AND indexname = 'idx_songs_search_tsv_gin';
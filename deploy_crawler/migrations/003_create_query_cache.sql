@@ -0,0 +1,22 @@
+-- ============================================================
+-- query_cache — 查询级缓存的持久层（API 侧使用，与 songs 表无关）
+--
+-- namespace 区分缓存种类（embedding / intent ...），value 以 JSONB 存储。
+-- 多个 uvicorn worker、重启后的进程共享同一份缓存。
+--
+-- 执行方式: psql -U root -d music_db -f 003_create_query_cache.sql
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS query_cache (
+  namespace  VARCHAR(32) NOT NULL,
+  cache_key  TEXT        NOT NULL,
+  value      JSONB       NOT NULL,
+  created_at TIMESTAMP   NOT NULL DEFAULT now(),
+  PRIMARY KEY (namespace, cache_key)
+);
+
+-- 过期清理用（读取时已按 TTL 过滤，可定期执行下方 DELETE 回收空间）
+CREATE INDEX IF NOT EXISTS idx_query_cache_created_at
+  ON query_cache (created_at);
+
+-- DELETE FROM query_cache WHERE created_at < now() - interval '7 days';
@@ -0,0 +1,28 @@
+-- ============================================================
+-- pg_trgm 索引 — title / artist 的 ILIKE '%x%' 与相似度 (%) 查询走索引
+--
+-- 搜歌名 / 搜歌手模式 (mode=title / artist) 与 exact 意图的精确匹配
+-- 原本前导通配符只能全表扫描，这里改为 trigram GIN 索引查找。
+-- 部分索引只覆盖 is_duplicate = false 的行（查询条件均带此过滤）。
+--
+-- 执行方式: psql -U root -d music_db -f 004_create_trgm_indexes.sql
+-- ============================================================
+
+-- 1. 启用 pg_trgm 扩展
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- 2. 歌名 trigram 索引
+CREATE INDEX IF NOT EXISTS idx_songs_title_trgm
+  ON songs USING gin (title gin_trgm_ops)
+  WHERE is_duplicate = false;
+
+-- 3. 歌手 trigram 索引
+CREATE INDEX IF NOT EXISTS idx_songs_artist_trgm
+  ON songs USING gin (artist gin_trgm_ops)
+  WHERE is_duplicate = false;
+
+-- 验证索引是否创建成功
+SELECT indexname, indexdef
+FROM pg_indexes
+WHERE tablename = 'songs'
+  AND indexname LIKE '%trgm%';
@@ -0,0 +1,19 @@
+-- ============================================================
+-- data_generation — 数据版本号（单行表）
+--
+-- 批处理脚本（向量化、分词/TF-IDF、去重标记、封面补录）写入后执行
+-- db_init.bump_data_generation() 使 generation + 1；API 定期轮询该值，
+-- 并把它作为搜索响应缓存 key 的一部分，数据更新后旧缓存自然失效。
+--
+-- 执行方式: psql -U root -d music_db -f 005_create_data_generation.sql
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS data_generation (
+  id         INTEGER   PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+  generation INTEGER   NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+INSERT INTO data_generation (id, generation)
+VALUES (1, 0)
+ON CONFLICT (id) DO NOTHING;
@@ -0,0 +1,24 @@
+-- ============================================================
+-- song_neighbors — 离线预计算的相似歌曲（默认权重 0.5 / 0.4 / 0.1）
+--
+-- 由 deploy_crawler/compute_song_neighbors.py 分块矩阵乘计算，
+-- 每首非重复歌曲保存 Top-K 邻居及融合分。/api/recommend 在默认权重下
+-- 直接按 (song_id, rank) 读取，不再逐次全表扫描。
+--
+-- computed_at 与 songs.updated_at 比较，用于增量重算新向量化的歌曲。
+--
+-- 执行方式: psql -U root -d music_db -f 006_create_song_neighbors.sql
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS song_neighbors (
+  song_id     VARCHAR(50) NOT NULL,
+  rank        INTEGER     NOT NULL,
+  neighbor_id VARCHAR(50) NOT NULL,
+  score       REAL        NOT NULL,
+  computed_at TIMESTAMP   NOT NULL DEFAULT now(),
+  PRIMARY KEY (song_id, rank)
+);
+
+-- 增量重算时反查 "哪些歌曲的邻居列表包含某首歌"
+CREATE INDEX IF NOT EXISTS idx_song_neighbors_neighbor
+  ON song_neighbors (neighbor_id);
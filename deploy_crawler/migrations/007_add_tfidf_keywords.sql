@@ -0,0 +1,37 @@
+-- ============================================================
+-- tfidf_keywords / tfidf_norm — TF-IDF 相似度改为索引化的加权余弦
+--
+-- 原先推荐 SQL 对每个候选行执行 jsonb_object_keys(tfidf_vector) 子查询计算关键词重叠数。
+-- 现在：
+--   tfidf_keywords TEXT[]  关键词集合，GIN 索引支持 && (数组有交集) 预筛
+--   tfidf_norm     REAL    关键词权重的 L2 范数
+-- 相似度 = Σ w_src(k) · w_cand(k) / (|src| · |cand|)，只对与源歌曲关键词有交集的行
+-- 计算，且只遍历源歌曲的 (≤20 个) 关键词，候选权重通过 tfidf_vector ->> key 直接取出。
+--
+-- compute_tfidf.py 重新计算时会同时写入这两列；这里为已有数据回填。
+-- 回填后需全量重算 song_neighbors：python compute_song_neighbors.py
+--
+-- 执行方式: psql -U root -d music_db -f 007_add_tfidf_keywords.sql
+-- ============================================================
+
+ALTER TABLE songs ADD COLUMN IF NOT EXISTS tfidf_keywords TEXT[];
+ALTER TABLE songs ADD COLUMN IF NOT EXISTS tfidf_norm REAL;
+
+-- 回填已有数据
+UPDATE songs
+SET
+  tfidf_keywords = ARRAY(SELECT jsonb_object_keys(tfidf_vector)),
+  tfidf_norm = (
+    SELECT sqrt(SUM(value::float8 ^ 2))
+    FROM jsonb_each_text(tfidf_vector)
+  )
+WHERE jsonb_typeof(tfidf_vector) = 'object';
+
+CREATE INDEX IF NOT EXISTS idx_songs_tfidf_keywords_gin
+  ON songs USING gin (tfidf_keywords);
+
+-- 验证
+SELECT
+  COUNT(*) FILTER (WHERE tfidf_vector IS NOT NULL) AS with_tfidf,
+  COUNT(*) FILTER (WHERE tfidf_keywords IS NOT NULL) AS with_keywords
+FROM songs;
@@ -0,0 +1,36 @@
+-- ============================================================
+-- base_title 主标题生成列 + 索引 — 同曲多版本去重改为 SQL DISTINCT ON
+--
+-- 原先推荐 dedupe=True 时多取 top_k * 5 条候选，再在 Python 中对每条跑三次正则，
+-- 版本很多的热门歌曲仍可能凑不满一页。
+-- base_title 是 STORED 生成列：INSERT / UPDATE title 时由 PostgreSQL 自动计算
+-- （爬虫入库无需改动），ADD COLUMN 时为已有数据回填。
+-- 规则与 app/services/dedupe.py::base_title 一致：
+--   去掉括号内容 → 去掉版本关键词 (cover/live/remix/dj/翻唱/版/ver) 及其后内容 → 去掉第一个空白之后的内容
+--
+-- 执行方式: psql -U root -d music_db -f 008_add_base_title.sql
+-- 预计耗时: 约 1~3 分钟（ADD COLUMN 会重写整张表）
+-- ============================================================
+
+-- 1. 生成列（与 app/database.py、deploy_crawler/db_init.py 中的定义一致）
+ALTER TABLE songs
+  ADD COLUMN IF NOT EXISTS base_title text
+  GENERATED ALWAYS AS (
+    btrim(regexp_replace(regexp_replace(regexp_replace(
+      title, '[(（\[【][^)）\]】]*[)）\]】]', '', 'g'),
+      '(cover|live|remix|dj|翻唱|版|ver\.?).*$', '', 'i'),
+      '\s+.*$', ''))
+  ) STORED;
+
+-- 2. B-tree 索引（只覆盖参与推荐 / 搜索的非重复歌曲）
+CREATE INDEX IF NOT EXISTS idx_songs_base_title
+  ON songs (base_title)
+  WHERE is_duplicate = false;
+
+-- 验证：版本最多的主标题
+SELECT base_title, COUNT(*) AS versions
+FROM songs
+WHERE is_duplicate = false
+GROUP BY base_title
+ORDER BY versions DESC
+LIMIT 10;
@@ -0,0 +1,25 @@
+-- ============================================================
+-- vibe_tags GIN 部分索引 — 首页情绪分区候选池
+--
+-- 原先 /api/songs/vibe-sections 每次请求跑 5 条
+--   WHERE vibe_tags @> '["深夜"]' OR ... ORDER BY random()
+-- 的全表扫描 + 排序。现在 API 进程定期（VIBE_SECTIONS_REFRESH_SECONDS）执行一次
+--   WHERE vibe_tags ?| ARRAY[全部分区标签]
+-- 把各分区的合格 id 载入内存，请求时只在内存中抽样（app/services/vibe_sections.py）。
+-- jsonb 默认的 jsonb_ops GIN 索引支持 ?|（数组中存在任一字符串元素）；
+-- 索引条件与查询的过滤条件一致，只覆盖有评语、有封面的非重复歌曲。
+--
+-- 执行方式: psql -U root -d music_db -f 009_create_vibe_tags_gin_index.sql
+-- ============================================================
+
+CREATE INDEX IF NOT EXISTS idx_songs_vibe_tags_gin
+  ON songs USING gin (vibe_tags)
+  WHERE is_duplicate = false
+    AND review_text IS NOT NULL
+    AND album_cover IS NOT NULL;
+
+-- 验证索引是否创建成功
+SELECT indexname, indexdef
+FROM pg_indexes
+WHERE tablename = 'songs'
+  AND indexname = 'idx_songs_vibe_tags_gin';